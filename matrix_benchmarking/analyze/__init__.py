@@ -1,4 +1,7 @@
 from collections import defaultdict
+import concurrent.futures
+import importlib
+import logging
 import types
 from typing import Optional, Callable
 import math
@@ -25,8 +28,155 @@ class RegressionStatus(types.SimpleNamespace):
         self.details_fmt = details_fmt
         self.details_conditional_fmt = details_conditional_fmt
 
-def do_regression_analyze(*args, **kwargs):
-    # lazy loading of hunter package ...
-    from .method import hunter as analyze_method
+    def __reduce__(self):
+        # SimpleNamespace.__reduce__ recreates the object without passing the mandatory arguments
+        return (self.__class__, (self.accepted, self.rating), self.__dict__)
 
-    return analyze_method.do_regression_analyze(*args, **kwargs)
+# name of the method --> module implementing it, loaded lazily (hunter is a heavy package)
+REGRESSION_METHODS = {
+    "hunter": "matrix_benchmarking.analyze.method.hunter",
+    "stdev": "matrix_benchmarking.analyze.method.stdev",
+    "zscore": "matrix_benchmarking.analyze.method.zscore",
+    "skeleton": "matrix_benchmarking.analyze.method.skeleton",
+}
+
+DEFAULT_METHOD = "hunter"
+
+regression_method = DEFAULT_METHOD
+screening_method = None
+
+
+def register_method(name, module_name):
+    REGRESSION_METHODS[name] = module_name
+
+
+def check_method(name):
+    if name not in REGRESSION_METHODS:
+        raise ValueError(f"Unknown regression method '{name}'. Available methods: {', '.join(REGRESSION_METHODS)}")
+
+
+def configure(method=None, screening=None):
+    """
+    method: the method used to analyze the KPIs without a @RegressionMethod
+    screening: if set, a (cheap) method that screens these KPIs first. Only the
+               KPIs it does not accept are analyzed with 'method'. The KPIs
+               with a @RegressionMethod are not screened, they are always
+               analyzed with their own method.
+    """
+
+    global regression_method, screening_method
+
+    if method:
+        check_method(method)
+    if screening:
+        check_method(screening)
+
+    regression_method = method or DEFAULT_METHOD
+    screening_method = screening or None
+
+
+def get_analyze_method(name=None):
+    if name is None:
+        name = regression_method
+
+    check_method(name)
+
+    return importlib.import_module(REGRESSION_METHODS[name])
+
+
+def do_regression_analyze(*args, method=None, **kwargs):
+    return get_analyze_method(method).do_regression_analyze(*args, **kwargs)
+
+
+def _do_regression_analyze(method_analyze_args):
+    method, (current_value, historical_values, lower_better, kpi_unit) = method_analyze_args
+
+    return do_regression_analyze(current_value, historical_values, lower_better=lower_better, kpi_unit=kpi_unit, method=method)
+
+
+def _do_regression_analyze_in_worker(method_analyze_args):
+    from . import cache as analyze_cache
+
+    regr_result = _do_regression_analyze(method_analyze_args)
+
+    # the cache entries used or added in the worker process must be
+    # sent back to the main process, which saves them
+    cache = analyze_cache.get_cache()
+    used_cache_entries = cache.pop_used_entries() if cache is not None else None
+
+    return regr_result, used_cache_entries
+
+
+def _do_method_regression_analyze_batch(method, analyze_args, jobs):
+    analyze_method = get_analyze_method(method)
+
+    if hasattr(analyze_method, "do_regression_analyze_batch"):
+        return analyze_method.do_regression_analyze_batch(analyze_args)
+
+    method_analyze_args = [(method, args) for args in analyze_args]
+
+    if jobs <= 1 or len(analyze_args) <= 1:
+        return [_do_regression_analyze(args) for args in method_analyze_args]
+
+    logging.info(f"Running the {method} regression analyses in {jobs} processes ...")
+    chunksize = max(1, len(analyze_args) // (jobs * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(_do_regression_analyze_in_worker, method_analyze_args, chunksize=chunksize))
+
+    from . import cache as analyze_cache
+    cache = analyze_cache.get_cache()
+
+    regr_results = []
+    for regr_result, used_cache_entries in results:
+        if cache is not None and used_cache_entries:
+            cache.update(used_cache_entries)
+
+        regr_results.append(regr_result)
+
+    return regr_results
+
+
+def do_regression_analyze_batch(analyze_args, jobs=1, methods=None):
+    """
+    Analyzes a list of (current_value, historical_values, lower_better, kpi_unit) tuples.
+    Returns the list of RegressionStatus, in the same order.
+
+    methods: the list of the methods to use for each tuple. None means the configured method,
+             after the screening method if any. The tuples with a method are not screened.
+
+    If the method analyzes the tuples one by one, they are distributed
+    to a pool of 'jobs' processes.
+    """
+
+    if methods is None:
+        methods = [None] * len(analyze_args)
+
+    regr_results = [None] * len(analyze_args)
+
+    if screening_method:
+        screened_indexes = [idx for idx, method in enumerate(methods) if method is None]
+        screening_results = _do_method_regression_analyze_batch(
+            screening_method, [analyze_args[idx] for idx in screened_indexes], jobs)
+
+        flagged = 0
+        for idx, regr_result in zip(screened_indexes, screening_results):
+            if regr_result.accepted is True:
+                regr_results[idx] = regr_result
+            else:
+                flagged += 1
+
+        logging.info(f"Screening with {screening_method}: {flagged}/{len(screened_indexes)} KPIs flagged for the {regression_method} analysis.")
+
+    method_indexes = defaultdict(list)
+    for idx, method in enumerate(methods):
+        if regr_results[idx] is not None: continue # already screened
+        method_indexes[method or regression_method].append(idx)
+
+    for method, indexes in method_indexes.items():
+        method_results = _do_method_regression_analyze_batch(
+            method, [analyze_args[idx] for idx in indexes], jobs)
+
+        for idx, regr_result in zip(indexes, method_results):
+            regr_results[idx] = regr_result
+
+    return regr_results
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import logging
+import pathlib
+
+#
+# Persistent cache of the regression analyses results, shared between
+# the analysis runs.
+#
+# The entries are keyed on a hash of the series and of the method
+# parameters. Only the entries used or added during a run are saved,
+# so the cache doesn't grow with the history.
+#
+
+_cache = None
+
+class AnalysisCache():
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+
+        self.entries = {}
+        self.used = {}
+        self.used_since_pop = {}
+
+        if not self.path.exists():
+            logging.info(f"Analysis cache {self.path} does not exist, starting with an empty cache.")
+            return
+
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except Exception as e:
+            logging.warning(f"Analysis cache {self.path} cannot be loaded, starting with an empty cache: {e}")
+            self.entries = {}
+
+        logging.info(f"Analysis cache {self.path} loaded with {len(self.entries)} entries.")
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is not None:
+            self.used[key] = self.used_since_pop[key] = value
+
+        return value
+
+    def set(self, key, value):
+        self.entries[key] = self.used[key] = self.used_since_pop[key] = value
+
+    def pop_used_entries(self):
+        """
+        Returns the entries used or added since the last call. The worker
+        processes send them back to the main process, which saves the cache.
+        """
+
+        used, self.used_since_pop = self.used_since_pop, {}
+
+        return used
+
+    def update(self, entries):
+        for key, value in entries.items():
+            self.set(key, value)
+
+    def save(self):
+        logging.info(f"Saving {len(self.used)} entries into the analysis cache {self.path} ...")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.used, f)
+            print("", file=f) # add EOL
+
+
+def compute_key(values, **params):
+    key_json = json.dumps(dict(values=values, params=params), sort_keys=True, default=str)
+
+    return hashlib.sha256(key_json.encode()).hexdigest()
+
+
+def configure(path):
+    global _cache
+    _cache = AnalysisCache(path) if path else None
+
+
+def get_cache():
+    return _cache
+
+
+def save():
+    if _cache is None:
+        return
+
+    _cache.save()
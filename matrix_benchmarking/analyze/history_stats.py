@@ -0,0 +1,104 @@
+import types
+import warnings
+
+import numpy as np
+
+#
+# Vectorized statistics of the historical values, computed for many
+# KPIs at once.
+#
+# The historical values are stored in a 2-D matrix (KPIs x history),
+# padded with NaN as the KPIs may have histories of different lengths.
+#
+
+def to_history_matrix(historical_values):
+    """
+    Returns the (KPIs x history) matrix of the historical values, padded with NaN, and the length of each history.
+    """
+
+    lengths = np.array([len(values) for values in historical_values], dtype=int)
+    width = lengths.max() if len(lengths) else 0
+
+    history = np.full((len(historical_values), width), np.nan)
+    for idx, values in enumerate(historical_values):
+        history[idx, :len(values)] = values
+
+    return history, lengths
+
+
+def compute(current_values, historical_values, max_stdev):
+    """
+    Computes the statistics of the historical values of many KPIs in one pass.
+
+    current_values: the current value of each KPI
+    historical_values: the list of the historical values of each KPI
+    max_stdev: the stdev bands are computed for the deviations 1 .. max_stdev-1
+
+    The mean, stdev, change and delta follow the conventions of method.stdev
+    (no history --> 0, 1 historical value --> this value).
+    The zscore follows the conventions of method.zscore (population stdev,
+    1 historical value --> 0).
+    """
+
+    current = np.array(current_values, dtype=float)
+    history, count = to_history_matrix(historical_values)
+    valid = ~np.isnan(history)
+
+    with np.errstate(divide="ignore", invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+
+        mean = np.where(valid, history, 0).sum(axis=1) / count
+        square_dist = np.where(valid, (history - mean[:, None]) ** 2, 0).sum(axis=1)
+
+        # method.stdev conventions
+        previous_mean = np.where(count == 0, 0, mean)
+        stdev = np.where(count == 0, 0,
+                         np.where(count == 1, previous_mean, np.sqrt(square_dist / (count - 1))))
+
+        change = np.where(previous_mean == 0, 100, ((current / previous_mean) * 100) - 100)
+        delta = current - previous_mean
+
+        # method.zscore conventions
+        pstdev = np.where(count == 1, 0, np.sqrt(square_dist / count))
+        zscore = np.where(count == 1, 0, (current - mean) / pstdev)
+
+        # stdev bands
+        band_pct = np.zeros((len(current), max(max_stdev - 1, 0)))
+        band_bound = np.zeros((len(current), max(max_stdev - 1, 0)), dtype=bool)
+
+        for deviation in range(1, max_stdev):
+            lower_outer = previous_mean - (stdev * deviation)
+            upper_outer = previous_mean + (stdev * deviation)
+
+            if deviation == 1:
+                def in_bands(values, lower_outer=lower_outer[:, None], upper_outer=upper_outer[:, None]):
+                    return [(values <= upper_outer) & (values >= lower_outer)]
+            else:
+                lower_inner = previous_mean - (stdev * (deviation - 1))
+                upper_inner = previous_mean + (stdev * (deviation - 1))
+
+                # the values on the bounds of both sides are counted twice, like in method.stdev
+                def in_bands(values,
+                             lower_outer=lower_outer[:, None], upper_outer=upper_outer[:, None],
+                             lower_inner=lower_inner[:, None], upper_inner=upper_inner[:, None]):
+                    return [(values <= lower_inner) & (values >= lower_outer),
+                            (values >= upper_inner) & (values <= upper_outer)]
+
+            observations = sum((in_band & valid).sum(axis=1) for in_band in in_bands(history))
+            current_in_bands = in_bands(current[:, None])
+
+            band_pct[:, deviation - 1] = np.where(count <= 1, 0, (observations / count) * 100)
+            band_bound[:, deviation - 1] = np.logical_or.reduce(current_in_bands)[:, 0]
+
+    return types.SimpleNamespace(
+        count=count,
+        previous_mean=previous_mean,
+        stdev=stdev,
+        change=change,
+        delta=delta,
+        historical_mean=np.where(count == 0, np.nan, mean),
+        pstdev=pstdev,
+        zscore=zscore,
+        band_pct=band_pct,
+        band_bound=band_bound,
+    )
@@ -1,8 +1,11 @@
+import os
+
 import numpy as np
 
 from hunter import analysis
 
 from matrix_benchmarking.analyze import RegressionStatus
+import matrix_benchmarking.analyze.cache as analyze_cache
 
 ###
 
@@ -10,26 +13,27 @@ WINDOW_LEN = 50
 MAX_PVALUE = 0.001
 MIN_MAGNITUDE = 0.05
 
+# if enabled, the change points of a series are computed from the cached
+# change points of the series without its last value, by analyzing only
+# the tail of the series again. Faster, but the results may differ from
+# a full analysis of the series.
+INCREMENTAL = os.environ.get("MATBENCH_ANALYZE_HUNTER_INCREMENTAL", "0") in ("1", "y", "yes", "true", "True")
+
 ###
 
 def do_regression_analyze(current_value, historical_values, lower_better, kpi_unit):
 
     values = historical_values + [current_value]
 
-    change_points = analysis.compute_change_points(
-        values,
-        window_len=WINDOW_LEN,
-        max_pvalue=MAX_PVALUE,
-        min_magnitude=MIN_MAGNITUDE
-    )
+    change_points = compute_change_points_details(values)
 
     status = 0
     direction = 0
     explanation = "No change point detected with hunter"
-    details = [cp_to_details(p) for p in change_points]
+    details = change_points
 
     if len(change_points):
-        direction = change_points[-1].stats.forward_rel_change()
+        direction = change_points[-1]["forward_rel_change"]
         # direction > 0 --> value increased
         # direction < 0 --> value decreated
         decreased = direction < 0
@@ -37,7 +41,7 @@ def do_regression_analyze(current_value, historical_values, lower_better, kpi_un
         improved = (decreased and lower_better) or (increased and not lower_better)
 
         # if the current value is alone in its statistical group:
-        if change_points[-1].index == len(historical_values):
+        if change_points[-1]["index"] == len(historical_values):
             accepted = False
             description = "Jump" if improved else "Regression"
             rating = 1
@@ -82,13 +86,74 @@ def __get_details_conditional_fmt(row):
 
 ###
 
-def cp_to_details(cp):
+def get_parameters():
+    return dict(
+        window_len=WINDOW_LEN,
+        max_pvalue=MAX_PVALUE,
+        min_magnitude=MIN_MAGNITUDE,
+    )
+
+
+def get_cache_parameters():
+    params = get_parameters()
+
+    # the incremental results must not be reused by the full analyses
+    if INCREMENTAL:
+        params["incremental"] = True
+
+    return params
+
+
+def compute_change_points_details(values):
+    params = get_parameters()
+
+    cache = analyze_cache.get_cache()
+    if cache is None:
+        return [cp_to_details(p) for p in analysis.compute_change_points(values, **params)]
+
+    cache_params = get_cache_parameters()
+
+    key = analyze_cache.compute_key(values, **cache_params)
+    if (details := cache.get(key)) is not None:
+        return details
+
+    prefix_details = cache.get(analyze_cache.compute_key(values[:-1], **cache_params)) \
+        if INCREMENTAL else None
+
+    if prefix_details is not None:
+        details = compute_change_points_details_incrementally(values, prefix_details, params)
+    else:
+        details = [cp_to_details(p) for p in analysis.compute_change_points(values, **params)]
+
+    cache.set(key, details)
+
+    return details
+
+
+def compute_change_points_details_incrementally(values, prefix_details, params):
+    # the change points found before the last window of the series are
+    # considered stable: only the part of the series starting at the
+    # change point before the last stable one is analyzed again.
+
+    stable_details = [d for d in prefix_details if d["index"] <= len(values) - 1 - WINDOW_LEN]
+    if len(stable_details) < 2:
+        return [cp_to_details(p) for p in analysis.compute_change_points(values, **params)]
+
+    start = stable_details[-2]["index"]
+
+    kept_details = [d for d in prefix_details if d["index"] <= start]
+    tail_change_points = analysis.compute_change_points(values[start:], **params)
+
+    return kept_details + [cp_to_details(p, offset=start) for p in tail_change_points]
+
+
+def cp_to_details(cp, offset=0):
     return {
-        "index": int(cp.index),
+        "index": int(cp.index) + offset,
         "mean_1": float(cp.stats.mean_1),
         "mean_2": float(cp.stats.mean_2),
         "std_1": float(cp.stats.std_1),
         "std_2": float(cp.stats.std_2),
         "pvalue": float(cp.stats.pvalue),
-        "forward_rel_change": cp.stats.forward_rel_change(),
+        "forward_rel_change": float(cp.stats.forward_rel_change()),
     }
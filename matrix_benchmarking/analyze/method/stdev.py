@@ -1,7 +1,5 @@
-from collections import defaultdict
-import statistics
-
 from matrix_benchmarking.analyze import RegressionStatus
+from matrix_benchmarking.analyze import history_stats
 
 IMPROVED_DESCRIPTION = {0: "very close+", 1: "in-line +", 2: "improved", 3:"improved +", 4: "improved++"}
 DEGRADED_DESCRIPTION = {0: "very close-", 1: "in-line -", 2: "degraded", 3:"degraded +", 4: "degraded++"}
@@ -17,12 +15,35 @@ MAX_STDEV = 4
 ########
 
 def do_regression_analyze(current_value, historical_values, lower_better, kpi_unit):
+    return do_regression_analyze_batch([(current_value, historical_values, lower_better, kpi_unit)])[0]
+
+
+def do_regression_analyze_batch(analyze_args):
+    """
+    Analyzes many (current_value, historical_values, lower_better, kpi_unit) tuples at once
+    """
+
+    if not analyze_args:
+        return []
+
+    current_values = [current_value for current_value, *_ in analyze_args]
+    all_historical_values = [historical_values for _, historical_values, *_ in analyze_args]
+
+    stats = history_stats.compute(current_values, all_historical_values, MAX_STDEV)
+
+    return [
+        _get_regression_status(stats, idx, current_value, lower_better, kpi_unit)
+        for idx, (current_value, _, lower_better, kpi_unit) in enumerate(analyze_args)
+    ]
+
+
+def _get_regression_status(stats, idx, current_value, lower_better, kpi_unit):
     details = dict(
         current_value = current_value,
-        previous_mean = get_measure_of_mean(historical_values),
-        std_dev = get_measure_of_distribution(historical_values),
-        change = get_percentage_change(current_value, historical_values),
-        delta = get_delta(current_value, historical_values),
+        previous_mean = float(stats.previous_mean[idx]),
+        std_dev = float(stats.stdev[idx]),
+        change = float(stats.change[idx]),
+        delta = float(stats.delta[idx]),
     )
 
     below = current_value < details["previous_mean"]
@@ -32,7 +53,9 @@ def do_regression_analyze(current_value, historical_values, lower_better, kpi_un
 
     found_in_stdev = MAX_STDEV
     for deviation in range(1, MAX_STDEV):
-        dev_dist, dev_bound = get_std_dev_measurements(deviation, current_value, historical_values)
+        dev_dist = float(stats.band_pct[idx, deviation - 1])
+        dev_bound = bool(stats.band_bound[idx, deviation - 1])
+
         details[f"std_dev_{deviation}"] = dev_dist
         if found_in_stdev != MAX_STDEV:
             details[f"std_dev_{deviation}_bound"] = None
@@ -89,102 +112,3 @@ def __get_details_conditional_fmt(row):
         fmt.append(style)
 
     return fmt
-
-
-#######################
-#######################
-#######################
-
-# Calculate sample/population mean
-
-def get_measure_of_mean(data):
-    '''
-    Returns Mean to determine the limits
-    '''
-    if len(data) == 1:
-        return data[-1]
-
-    if len(data) == 0:
-        return 0
-
-    return statistics.mean(data)
-
-
-# Calculate sample/population standard deviation
-
-def get_measure_of_distribution(data):
-    '''
-    Returns STDDEV to determine the limits
-    '''
-    if len(data) == 1:
-        return data[-1]
-
-    if len(data) == 0:
-        return 0
-
-
-    return statistics.stdev(data)
-
-
-def get_std_dev_measurements(deviation, current_mean, previous_data):
-    '''
-    Returns standard deviation bounds
-    '''
-
-    previous_data_mean = get_measure_of_mean(previous_data)
-    previous_data_stddev = get_measure_of_distribution(previous_data)
-
-    if deviation == 1:
-        std_lower_bound = previous_data_mean - (previous_data_stddev * deviation)
-        std_upper_bound = previous_data_mean + (previous_data_stddev * deviation)
-
-        number_of_observation = len([item for item in previous_data if item <= std_upper_bound and item >= std_lower_bound])
-        if current_mean <= std_upper_bound and current_mean >= std_lower_bound:
-            bound_verify = True
-        else:
-            bound_verify = False
-
-    else:
-        std_lower_bound_1 = previous_data_mean - (previous_data_stddev * (deviation - 1))
-        std_upper_bound_1 = previous_data_mean + (previous_data_stddev * (deviation - 1))
-
-        std_lower_bound_2 = previous_data_mean - (previous_data_stddev * deviation)
-        std_upper_bound_2 = previous_data_mean + (previous_data_stddev * deviation)
-
-        number_of_observation_below_the_mean = len([item for item in previous_data if item <= std_lower_bound_1 and item >= std_lower_bound_2])
-        number_of_observation_above_the_mean = len([item for item in previous_data if item >= std_upper_bound_1 and item <= std_upper_bound_2])
-
-        number_of_observation = number_of_observation_above_the_mean + number_of_observation_below_the_mean
-
-        if current_mean <= std_lower_bound_1 and current_mean >= std_lower_bound_2:
-            bound_verify = True
-        elif current_mean >= std_upper_bound_1 and current_mean <= std_upper_bound_2:
-            bound_verify = True
-        else:
-            bound_verify = False
-
-    pct = 0 if len(previous_data) <= 1 \
-        else (number_of_observation / len(previous_data)) * 100
-
-    return pct, bound_verify
-
-
-def get_percentage_change(mean, previous_data):
-    '''
-    Returns %change w.r.t the average mean
-    '''
-
-    previous_data_mean = get_measure_of_mean(previous_data)
-    if previous_data_mean == 0:
-        return 100
-    else:
-        return (((mean / previous_data_mean) * 100) - 100)
-
-
-def get_delta(mean, previous_data):
-    '''
-    Returns the difference of current_mean and previous_mean
-    '''
-
-    previous_data_mean = get_measure_of_mean(previous_data)
-    return (mean - previous_data_mean)
@@ -1,6 +1,5 @@
 from matrix_benchmarking.analyze import RegressionStatus
-
-import numpy as np
+from matrix_benchmarking.analyze import history_stats
 
 THRESHOLD = 3
 
@@ -10,13 +9,33 @@ def do_regression_analyze(current_value, historical_values, lower_better, kpi_un
     standard deviations away from the previous_results
     """
 
-    historical_mean = np.mean(historical_values)
-    if len(historical_values) == 1:
-        std = 0
-        z_score = 0
-    else:
-        std = np.std(historical_values)
-        z_score = (current_value - historical_mean) / std
+    return do_regression_analyze_batch([(current_value, historical_values, lower_better, kpi_unit)])[0]
+
+
+def do_regression_analyze_batch(analyze_args):
+    """
+    Analyzes many (current_value, historical_values, lower_better, kpi_unit) tuples at once
+    """
+
+    if not analyze_args:
+        return []
+
+    current_values = [current_value for current_value, *_ in analyze_args]
+    all_historical_values = [historical_values for _, historical_values, *_ in analyze_args]
+
+    stats = history_stats.compute(current_values, all_historical_values, max_stdev=0)
+
+    return [
+        _get_regression_status(stats, idx, current_value, kpi_unit)
+        for idx, (current_value, _, _, kpi_unit) in enumerate(analyze_args)
+    ]
+
+
+def _get_regression_status(stats, idx, current_value, kpi_unit):
+    historical_mean = float(stats.historical_mean[idx])
+    std = float(stats.pstdev[idx])
+    z_score = float(stats.zscore[idx])
+    historical_count = stats.count[idx]
 
     details = {
         "current_value": current_value,
@@ -26,7 +45,7 @@ def do_regression_analyze(current_value, historical_values, lower_better, kpi_un
         "stddev": std
     }
     improved = True if z_score > 0 else False
-    if len(historical_values) == 1:
+    if historical_count == 1:
         accepted = None
         description = "Not enough historical values"
     elif abs(z_score) < THRESHOLD:
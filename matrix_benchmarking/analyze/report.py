@@ -2,6 +2,7 @@ import logging
 import math
 from collections import defaultdict
 import copy
+import functools
 from packaging.version import Version, InvalidVersion
 import yaml
 
@@ -12,6 +13,7 @@ import plotly.express as px
 from dash import html
 
 import matrix_benchmarking.plotting.ui.report as plotting_ui_report
+from matrix_benchmarking.plotting.ui.table import Table
 import matrix_benchmarking.common as common
 
 import matrix_benchmarking.analyze as analyze
@@ -22,6 +24,10 @@ INCLUDE_ALL_THE_ENTRIES = True
 INCLUDE_ALL_THE_KPIS = True
 # if false, do not include the regression plots (~4.5MB per plot)
 INCLUDE_REGRESSION_PLOT = False
+# if true, the regression plots of a report page share a single plotly.js bundle
+SHARE_PLOTLYJS = True
+# number of entries analyzed in one batch. Bounds the comparison data kept in memory.
+ANALYSIS_BATCH_ENTRIES = 50
 
 COLOR_OVERVIEW_NAME_META = "#F5F5DC" # beige
 COLOR_OVERVIEW_NAME_VAR = "#ADD8E6" # light green
@@ -98,9 +104,12 @@ STYLE_HIDE_COLUMN_TITLES = [{'selector': 'thead', 'props': [('display', 'none')]
 
 
 class OvervallResult():
-    def __init__(self, rating, description, improved, current_value_str):
+    # kept for every entry x KPI until the results overview is generated,
+    # so only store what the overview shows
+    __slots__ = ("rating", "improved", "current_value_str")
+
+    def __init__(self, rating, improved, current_value_str):
         self.rating = rating
-        self.description = description
         self.improved = improved
         self.current_value_str = current_value_str
 
@@ -123,7 +132,12 @@ def longestCommonPrefix(strs):
     return min_s[:]
 
 
-def generate_regression_analyse_report(regression_df, kpi_filter, comparison_keys, ignored_keys, sorting_keys):
+def generate_regression_analyse_report(regression_df, kpi_filter, comparison_keys, ignored_keys, sorting_keys, jobs=1, report_writer=None):
+    """
+    report_writer: if set, the entries are passed to report_writer.write() as soon as they
+                   are generated, and only the report header (title and summary) is returned.
+    """
+
     pio.renderers.default = "notebook"
 
     idx = 0
@@ -196,7 +210,7 @@ def generate_regression_analyse_report(regression_df, kpi_filter, comparison_key
         kpis_common_prefix = longestCommonPrefix(list(kpis.keys()))
         break
 
-    for row_values in regression_df.values:
+    for row_values, entry_analyses in _analyze_entries(regression_df, kpi_filter, comparison_keys, warnings_already_shown, jobs):
         idx += 1
 
         logging.info(f"Processing entry # {idx} ...")
@@ -235,81 +249,10 @@ def generate_regression_analyse_report(regression_df, kpi_filter, comparison_key
             entry_regr_results["name"] = regression_name
 
         include_this_entry_in_report = False
+        entry_failures = 0
+        entry_improvements = 0
 
-        for kpi in kpis:
-            if kpi_filter and kpi_filter not in kpi:
-                continue
-
-            ref_kpi = ref_entry.results.lts.kpis[kpi]
-            if isinstance(ref_kpi.value, list): continue
-
-            if ref_kpi.ignored_for_regression:
-                continue
-
-            ref_name = row["ref"]
-
-            comparison_data = []
-
-            ref_line = dict()
-            for k in comparison_keys:
-                ref_line[k] = ref_kpi.__dict__.get(k)
-
-            # keep this vvv below ^^^ to preserve the order in the rendered table
-            ref_line["value"] = ref_kpi.value
-            ref_line["ref"] = "*"
-
-            if formatted_value := format_kpi_value(ref_kpi, want_raw_value=False):
-                ref_line["formatted value"] = formatted_value
-
-            comparison_data.append(ref_line)
-
-            historical_values = []
-
-            for comparison_key_value in sorted(row.keys()):
-                if comparison_key_value == "ref": continue
-
-                comparison_gathered_entries = row[comparison_key_value]
-                if is_nan(comparison_gathered_entries):
-                    continue
-                if comparison_key_value == row["ref"]:
-                    continue
-
-                entry = comparison_gathered_entries.results[0]
-
-                entry_name = {k: entry.results.metadata.settings.__dict__[k] for k in comparison_keys}
-
-                records_count = len(comparison_gathered_entries.results)
-                if records_count != 1:
-                    msg = f"Multiple records ({records_count}) found for {entry_name}. Taking the first one."
-                    if msg not in warnings_already_shown:
-                        warnings_already_shown.append(msg)
-                        logging.warning(msg)
-
-                kpi_entry = entry.results.kpis.__dict__[kpi]
-                history_line = dict(
-                    ref="",
-                    value=kpi_entry.value,
-                )
-
-                if formatted_value := format_kpi_value(kpi_entry, want_raw_value=False, fmt_kpi=ref_kpi):
-                    history_line["formatted value"] = formatted_value
-
-                comparison_data.append(history_line | entry_name)
-                historical_values.append(kpi_entry.value)
-
-
-            # Comparison table
-
-            lower_better = getattr(ref_kpi, "lower_better", None)
-
-            if lower_better is None:
-                msg = f"KPI '{kpi}' does not define the 'lower_better' property :/ "
-                if msg not in warnings_already_shown:
-                    logging.warning(msg)
-                    warnings_already_shown.append(msg)
-
-            regr_result = analyze.do_regression_analyze(ref_kpi.value, historical_values, lower_better=lower_better, kpi_unit=ref_kpi.unit)
-
+        for kpi, ref_kpi, comparison_data, regr_result in entry_analyses:
             validate_regression_result(regr_result)
 
             current_value_str = format_kpi_value(ref_kpi)
@@ -317,7 +260,6 @@ def generate_regression_analyse_report(regression_df, kpi_filter, comparison_key
             entry_regr_results[kpi.replace(kpis_common_prefix, "")] = \
                 OvervallResult(
                     regr_result.rating,
-                    regr_result.description,
                     regr_result.improved,
                     current_value_str=current_value_str)
 
@@ -326,11 +268,13 @@ def generate_regression_analyse_report(regression_df, kpi_filter, comparison_key
                 total_points += 1
                 if regr_result.accepted is False:
                     failures += 1
+                    entry_failures += 1
                     include_this_kpi_in_report = True
                 elif regr_result.accepted is None:
                     not_analyzed += 1
                 elif regr_result.improved and regr_result.rating > 1:
                     significant_performance_increase += 1
+                    entry_improvements += 1
                     include_this_kpi_in_report = True
 
 
@@ -372,7 +316,12 @@ def generate_regression_analyse_report(regression_df, kpi_filter, comparison_key
 
         if not include_this_entry_in_report: continue
 
-        report += entry_report
+        if report_writer is not None:
+            entry_status = _get_entry_status(has_history, entry_failures, entry_improvements)
+            report_writer.write_entry(idx, regression_name, entry_status, entry_report)
+        else:
+            report += entry_report
+
         all_regr_results_data.append(entry_regr_results)
 
     # Configuration overview
@@ -429,8 +378,24 @@ def generate_and_save_regression_analyse_report(
         regression_df,
         kpi_filter,
         comparison_key, ignored_keys, sorting_keys,
+        jobs=1,
+        entries_per_page=0,
 ):
-    report, failures, yaml_summary = generate_regression_analyse_report(regression_df, kpi_filter, comparison_key, ignored_keys, sorting_keys)
+    # stream the entries to disk, so that the report doesn't have to fit in memory
+    if report_dest is None:
+        report_writer = None
+    elif entries_per_page:
+        report_writer = plotting_ui_report.ShardedReport(report_dest, entries_per_page, share_plotlyjs=SHARE_PLOTLYJS)
+    else:
+        report_writer = plotting_ui_report.StreamingReport(report_dest, share_plotlyjs=SHARE_PLOTLYJS)
+
+    try:
+        report, failures, yaml_summary = generate_regression_analyse_report(regression_df, kpi_filter, comparison_key, ignored_keys, sorting_keys,
+                                                                            jobs=jobs, report_writer=report_writer)
+    except Exception:
+        if report_writer is not None:
+            report_writer.discard()
+        raise
 
     if yaml_dest:
         logging.info(f"Saving the YAML summary into {yaml_dest} ...")
@@ -443,11 +408,140 @@ def generate_and_save_regression_analyse_report(
         return failures
 
     logging.info(f"Saving the HTML report into {report_dest} ...")
-    plotting_ui_report.generate(None, report_dest, report, None, include_header=False)
+    report_writer.close(report.children)
 
     return failures
 
 
+def _analyze_entries(regression_df, kpi_filter, comparison_keys, warnings_already_shown, jobs):
+    """
+    Yields the row values of each entry, along with the (kpi, ref_kpi, comparison_data, regr_result)
+    of its analyzed KPIs.
+
+    The entries are analyzed ANALYSIS_BATCH_ENTRIES at a time, so that only
+    the comparison data of one batch of entries is kept in memory.
+    """
+
+    rows_values = regression_df.values
+    for batch_start in range(0, len(rows_values), ANALYSIS_BATCH_ENTRIES):
+        batch = []
+        analyze_args = []
+        methods = []
+        for row_values in rows_values[batch_start:batch_start + ANALYSIS_BATCH_ENTRIES]:
+            row = dict(zip(regression_df, row_values))
+            ref_entry = row[row["ref"]]
+
+            entry_analyses = []
+            for kpi, ref_kpi in _get_analyzed_kpis(ref_entry, kpi_filter):
+                comparison_data, historical_values, lower_better = \
+                    _generate_comparison_data(row, kpi, ref_kpi, comparison_keys, warnings_already_shown)
+
+                entry_analyses.append((kpi, ref_kpi, comparison_data))
+                analyze_args.append((ref_kpi.value, historical_values, lower_better, ref_kpi.unit))
+                # the KPI may override the regression method (@RegressionMethod)
+                methods.append(getattr(ref_kpi, "regression_method", None))
+
+            batch.append((row_values, entry_analyses))
+
+        logging.info(f"Running {len(analyze_args)} regression analyses ...")
+        regr_results = iter(analyze.do_regression_analyze_batch(analyze_args, jobs=jobs, methods=methods))
+        del analyze_args
+
+        # pop the entries, so that their comparison data is released once rendered
+        batch.reverse()
+        while batch:
+            row_values, entry_analyses = batch.pop()
+            yield row_values, [(kpi, ref_kpi, comparison_data, next(regr_results))
+                               for kpi, ref_kpi, comparison_data in entry_analyses]
+
+
+def _get_entry_status(has_history, entry_failures, entry_improvements):
+    if not has_history:
+        return "no historical records"
+
+    status = []
+    if entry_failures:
+        status.append(f"FAILED ({entry_failures} KPI{'s' if entry_failures > 1 else ''})")
+    if entry_improvements:
+        status.append(f"improved ({entry_improvements} KPI{'s' if entry_improvements > 1 else ''})")
+
+    return ", ".join(status) if status else "passed"
+
+
+def _get_analyzed_kpis(ref_entry, kpi_filter):
+    for kpi, ref_kpi in ref_entry.results.lts.kpis.items():
+        if kpi_filter and kpi_filter not in kpi:
+            continue
+
+        if isinstance(ref_kpi.value, list): continue
+
+        if ref_kpi.ignored_for_regression:
+            continue
+
+        yield kpi, ref_kpi
+
+
+def _generate_comparison_data(row, kpi, ref_kpi, comparison_keys, warnings_already_shown):
+    comparison_data = []
+
+    ref_line = dict()
+    for k in comparison_keys:
+        ref_line[k] = ref_kpi.__dict__.get(k)
+
+    # keep this vvv below ^^^ to preserve the order in the rendered table
+    ref_line["value"] = ref_kpi.value
+    ref_line["ref"] = "*"
+
+    if formatted_value := format_kpi_value(ref_kpi, want_raw_value=False):
+        ref_line["formatted value"] = formatted_value
+
+    comparison_data.append(ref_line)
+
+    historical_values = []
+
+    for comparison_key_value in sorted(row.keys()):
+        if comparison_key_value == "ref": continue
+
+        comparison_gathered_entries = row[comparison_key_value]
+        if is_nan(comparison_gathered_entries):
+            continue
+        if comparison_key_value == row["ref"]:
+            continue
+
+        entry = comparison_gathered_entries.results[0]
+
+        entry_name = {k: entry.results.metadata.settings.__dict__[k] for k in comparison_keys}
+
+        records_count = len(comparison_gathered_entries.results)
+        if records_count != 1:
+            msg = f"Multiple records ({records_count}) found for {entry_name}. Taking the first one."
+            if msg not in warnings_already_shown:
+                warnings_already_shown.append(msg)
+                logging.warning(msg)
+
+        kpi_entry = entry.results.kpis.__dict__[kpi]
+        history_line = dict(
+            ref="",
+            value=kpi_entry.value,
+        )
+
+        if formatted_value := format_kpi_value(kpi_entry, want_raw_value=False, fmt_kpi=ref_kpi):
+            history_line["formatted value"] = formatted_value
+
+        comparison_data.append(history_line | entry_name)
+        historical_values.append(kpi_entry.value)
+
+    lower_better = getattr(ref_kpi, "lower_better", None)
+
+    if lower_better is None:
+        msg = f"KPI '{kpi}' does not define the 'lower_better' property :/ "
+        if msg not in warnings_already_shown:
+            logging.warning(msg)
+            warnings_already_shown.append(msg)
+
+    return comparison_data, historical_values, lower_better
+
+
 def _generate_entry_header(metadata_settings, metadata):
     header = []
 
@@ -470,9 +564,7 @@ def _generate_entry_header(metadata_settings, metadata):
     metadata.__dict__.pop("run_id", None)
     metadata.__dict__.pop("config", None)
 
-    lts_metadata_df = pd.DataFrame(metadata.__dict__.items())
-    lts_metadata_html = lts_metadata_df.style\
-                               .hide(axis="index")\
+    lts_metadata_html = Table.from_items(metadata.__dict__.items())\
                                .set_table_styles(table_styles=STYLE_TABLE + STYLE_HIDE_COLUMN_TITLES)
 
     header.append(lts_metadata_html)
@@ -485,51 +577,61 @@ def _generate_entry_header(metadata_settings, metadata):
     metadata_settings.__dict__.pop("test_path", None)
     metadata_settings.__dict__.pop("run_id", None)
 
-    kpi_settings_df = pd.DataFrame(metadata_settings.__dict__.items())
-
-    kpi_settings_html = kpi_settings_df.style\
-                               .hide(axis="index")\
+    kpi_settings_html = Table.from_items(metadata_settings.__dict__.items())\
                                .set_table_styles(table_styles=STYLE_TABLE + STYLE_HIDE_COLUMN_TITLES)
 
     header.append(kpi_settings_html)
 
     return header
 
-def _generate_sorted_pd_table(comparison_data, comparison_keys, warn=True):
-    comparison_df = pd.DataFrame(comparison_data)
+# the same values are sorted for every KPI of every entry,
+# so parse them only once for the whole report
+@functools.lru_cache(maxsize=None)
+def _parse_version(value):
+    try:
+        return Version(value)
+    except InvalidVersion:
+        pass
+    safe_value = "1+" + value.replace("/", ".").replace(":", ".").replace(", ", "-")
+    try:
+        return Version(safe_value)
+    except InvalidVersion:
+        return None
 
-    common_prefixes = {}
 
-    for comparison_key in comparison_keys:
-        common_prefixes[comparison_key] = longestCommonPrefix(list(comparison_df[comparison_key].values))
+_unparsable_versions_already_shown = set()
 
-    def to_version(value):
-        try:
-            return Version(str(value))
-        except InvalidVersion:
-            pass
-        safe_value = "1+" + str(value).replace("/", ".").replace(":", ".").replace(", ", "-")
-        try:
-            return Version(safe_value)
-        except InvalidVersion:
-            if warn:
-                logging.warning(f"Cannot parse '{value}' as a version :/ ({safe_value})")
-            return Version("1.0") # ordering will be wrong
+def _to_version(value, warn=True):
+    value = str(value)
+
+    version = _parse_version(value)
+    if version is not None:
+        return version
+
+    if warn and value not in _unparsable_versions_already_shown:
+        _unparsable_versions_already_shown.add(value)
+        safe_value = "1+" + value.replace("/", ".").replace(":", ".").replace(", ", "-")
+        logging.warning(f"Cannot parse '{value}' as a version :/ ({safe_value})")
 
-    def create_sort_index(_row):
-        sort_index = []
+    return Version("1.0") # ordering will be wrong
 
-        for comparison_key in comparison_keys:
-            common_prefix = common_prefixes[comparison_key]
-            value = _row[comparison_key]
-            if common_prefix:
-                value = value.removeprefix(common_prefix)
 
-            sort_index += [to_version(value)]
+def _generate_sorted_pd_table(comparison_data, comparison_keys, warn=True):
+    comparison_df = pd.DataFrame(comparison_data)
+
+    # build the sort index column by column
+    sort_index_columns = []
+    for comparison_key in comparison_keys:
+        values = list(comparison_df[comparison_key].values)
+
+        common_prefix = longestCommonPrefix(values)
+        if common_prefix:
+            values = [value.removeprefix(common_prefix) for value in values]
 
-        return sort_index
+        sort_index_columns.append([_to_version(value, warn) for value in values])
 
-    comparison_df["__sort_index"] = comparison_df.apply(create_sort_index, axis=1)
+    comparison_df["__sort_index"] = [list(sort_index) for sort_index in zip(*sort_index_columns)] \
+        if sort_index_columns else [[] for _ in range(len(comparison_df))]
 
     return comparison_df.sort_values("__sort_index").drop("__sort_index", axis=1)
 
@@ -537,9 +639,8 @@ def _generate_sorted_pd_table(comparison_data, comparison_keys, warn=True):
 def _generate_comparison_table(comparison_df, kpi_unit):
     comparison_format = dict(value="{:.2f} "+kpi_unit,)
 
-    comparison_df_html = comparison_df.style\
+    comparison_df_html = Table.from_df(comparison_df)\
                                       .format(comparison_format)\
-                                      .hide(axis="index")\
                                       .set_table_styles(table_styles=STYLE_TABLE)
 
     return comparison_df_html
@@ -573,17 +674,16 @@ def _generate_evaluation_results(regr_result):
         return fmt
 
     rating_color = get_rating_color(regr_result.rating, regr_result.improved)
-    regr_df_html = pd.DataFrame([dict(
+    regr_df_html = Table.from_records([dict(
         improved=regr_result.improved,
         rating=regr_result.rating,
         rating_color=rating_color,
         description=regr_result.description,
         accepted=regr_result.accepted,
-    )]).style\
+    )])\
                      .format(regr_results_evaluation_fmt)\
-                     .apply(regr_results_evaluation_style, axis=1)\
-                     .hide(["rating_color"], axis=1)\
-                     .hide(axis="index")\
+                     .apply(regr_results_evaluation_style)\
+                     .hide_columns(["rating_color"])\
                      .set_table_styles(table_styles=STYLE_TABLE)
 
     return regr_df_html
@@ -601,11 +701,8 @@ def _generate_lts_overview(all_lts_settings, lts_variables):
 
         return [f"background: {color}"] * len(row)
 
-    lts_config_overview_df = pd.DataFrame(lts_config_overview_data)
-    lts_config_overview_df_html = lts_config_overview_df\
-        .style\
-        .apply(lts_config_overview_conditional_format, axis = 1)\
-        .hide(axis="index")\
+    lts_config_overview_df_html = Table.from_records(lts_config_overview_data)\
+        .apply(lts_config_overview_conditional_format)\
         .set_table_styles(table_styles=STYLE_TABLE)
 
     return lts_config_overview_df_html
@@ -630,11 +727,8 @@ def _generate_configuration_overview(all_settings, variables):
 
         return [f"background: {color}"] * len(row)
 
-    config_overview_df = pd.DataFrame(config_overview_data)
-    config_overview_df_html = config_overview_df\
-        .style\
-        .apply(config_overview_conditional_format, axis = 1)\
-        .hide(axis="index")\
+    config_overview_df_html = Table.from_records(config_overview_data)\
+        .apply(config_overview_conditional_format)\
         .set_table_styles(table_styles=STYLE_TABLE)
 
     return config_overview_df_html
@@ -665,12 +759,10 @@ def _generate_results_overview(all_regr_results_data, variables, kpi_names, kpis
             if not has_regression:
                 kpis_to_hide.append(kpi_name)
 
-    all_regr_results_df_html = all_regr_results_df\
-        .style\
-        .apply(get_all_regr_results_conditional_format(variables), axis = 1)\
+    all_regr_results_df_html = Table.from_df(all_regr_results_df)\
+        .apply(get_all_regr_results_conditional_format(variables))\
         .format(overview_fmt)\
-        .hide(axis="index")\
-        .hide(kpis_to_hide, axis=1)\
+        .hide_columns(kpis_to_hide)\
         .set_table_styles(table_styles=STYLE_TABLE)
 
     return all_regr_results_df_html
@@ -721,11 +813,9 @@ def validate_regression_result(regr_result):
 
 def _generate_details_table(regr_result):
     details_data = [regr_result.details] if isinstance(regr_result.details, dict) else regr_result.details
-    regr_df_html = pd.DataFrame(details_data)\
-                     .style\
-                     .apply(regr_result.details_conditional_fmt, axis = 1)\
+    regr_df_html = Table.from_records(details_data)\
+                     .apply(regr_result.details_conditional_fmt)\
                      .format(regr_result.details_fmt)\
-                     .hide(axis="index")\
                      .set_table_styles(table_styles=STYLE_TABLE)
 
     return regr_df_html
@@ -766,7 +856,7 @@ def _generate_comparison_plot(_comparison_df, comparison_keys, kpi_name, ref_kpi
     fig.update_layout(title=title, title_x=0.5,)
 
     # not using dcc.Graph() here, so this will follow another path than plots in plotting reports.
-    # here, fig.to_html() will be called.
+    # here, the figure HTML will be embedded in the report.
     return html.Div([fig], style=dict(height="525px", width="100%"))
 
 
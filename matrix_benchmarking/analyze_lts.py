@@ -14,7 +14,9 @@ from opensearchpy import OpenSearch
 import matrix_benchmarking.common as common
 import matrix_benchmarking.cli_args as cli_args
 import matrix_benchmarking.store as store
+import matrix_benchmarking.analyze as analyze
 import matrix_benchmarking.analyze.report as analyze_report
+import matrix_benchmarking.analyze.cache as analyze_cache
 
 LTS_ANCHOR_NAME = "source.lts.yaml"
 
@@ -26,6 +28,12 @@ def main(workload: str = "",
          report_dest: str = "regression_report.html",
          summary_yaml_dest: str = "regression_summary.yaml",
          kpi_filter: str = "",
+         jobs: int = 1,
+         analysis_cache: str = "",
+         method: str = "",
+         screening_method: str = "",
+         report_entries_per_page: int = 0,
+         report_only_changes: bool = None,
          ):
     """
 Analyze MatrixBenchmark LTS results
@@ -39,6 +47,12 @@ Env:
     MATBENCH_LTS_RESULTS_DIRNAME
     MATBENCH_FILTERS
     MATBENCH_REPORT_DEST
+    MATBENCH_JOBS
+    MATBENCH_ANALYSIS_CACHE
+    MATBENCH_METHOD
+    MATBENCH_SCREENING_METHOD
+    MATBENCH_REPORT_ENTRIES_PER_PAGE
+    MATBENCH_REPORT_ONLY_CHANGES
 Args:
     workload: Name of the workload to execute. (Mandatory.)
     workload_base_directory: the directory from where the workload packages should be loaded. (Optional)
@@ -48,6 +62,12 @@ Args:
     report_dest: Where to save the regression analyses report
     kpi_filter: Filter (substring) that must be part of the KPI name to include it in the regression analyses
     summary_yaml_dest: Where to save the YAML summary of the regression analyses
+    jobs: Number of processes used to run the regression analyses in parallel
+    analysis_cache: File where the regression analyses results are cached between the runs. With MATBENCH_ANALYZE_HUNTER_INCREMENTAL=1, hunter reuses the cached results of the series without its last value (faster, but the results may differ from a full analysis) (Optional)
+    method: Regression analysis method used for the KPIs without @RegressionMethod (hunter, stdev, zscore, ...). Default: hunter (Optional)
+    screening_method: If provided, cheap regression analysis method used to screen the KPIs. Only the KPIs it does not accept are analyzed with the regression method. The KPIs with @RegressionMethod are not screened (Optional)
+    report_entries_per_page: If provided, split the report into pages of this number of entries, listed in the report_dest index page (Optional)
+    report_only_changes: If provided, only include the entries with a regression or an improvement in the report (Optional)
     """
 
     kwargs = dict(locals()) # capture the function arguments
@@ -55,6 +75,12 @@ Args:
     cli_args.setup_env_and_kwargs(kwargs)
     cli_args.check_mandatory_kwargs(kwargs, ("workload", "results_dirname", "lts_results_dirname"))
 
+    try:
+        analyze.configure(method=kwargs["method"], screening=kwargs["screening_method"])
+    except ValueError as e:
+        logging.critical(str(e))
+        sys.exit(1)
+
     def run():
         cli_args.store_kwargs(kwargs, execution_mode="analyze-lts")
         store_dir = pathlib.Path(kwargs["report_dest"]).parent
@@ -90,14 +116,23 @@ Args:
 
         regression_df, comparison_keys, ignored_keys, sorting_keys = workload_analyze.prepare()
 
+        analyze_cache.configure(kwargs["analysis_cache"])
+
+        if kwargs["report_only_changes"]:
+            analyze_report.INCLUDE_ALL_THE_ENTRIES = False
+
         try:
             failures = analyze_report.generate_and_save_regression_analyse_report(
                 kwargs["report_dest"], kwargs["summary_yaml_dest"],
                 regression_df, kwargs["kpi_filter"],
                 comparison_keys, ignored_keys, sorting_keys,
+                jobs=int(kwargs["jobs"]),
+                entries_per_page=int(kwargs["report_entries_per_page"] or 0),
             )
 
             logging.info(f"The regression analyze finished with code {failures}.")
+
+            analyze_cache.save()
         except Exception as e:
             with open(store_dir / "FAILURE", 'a') as f:
                 print(str(e), file=f)
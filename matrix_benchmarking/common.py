@@ -1,6 +1,6 @@
 from typing import Iterator
 import logging
-import os, types, itertools
+import os, types, itertools, contextlib
 from collections import defaultdict
 import pathlib
 
@@ -8,6 +8,15 @@ import matrix_benchmarking
 
 MISSING_SETTING_VALUE = None
 
+
+def _no_timing_span(name, stat=None):
+    return contextlib.nullcontext()
+
+# measures the duration of the records queries. No-op by default,
+# replaced by plotting.metrics.span when the visualizer instrumentation
+# is loaded.
+timing_span = _no_timing_span
+
 class MatrixEntry(types.SimpleNamespace):
     def __init__(self, location, results, exit_code,
                  processed_key, import_key,
@@ -76,9 +85,44 @@ LTS_META_KEYS = [
 
     "format", "full_format",
     "ignored_for_regression", "divisor", "divisor_unit",
-    "lower_better",
+    "lower_better", "regression_method",
 ]
 
+class _RecordsIndex():
+    """
+    Index of the records keys, by setting value.
+
+    The values are indexed by their string representation, as the
+    MatrixKeys are compared by their string representation.
+    """
+
+    def __init__(self, processed_map):
+        self.processed_map = processed_map
+        self.size = len(processed_map)
+
+        self.keys = {} # str(key) --> key
+        self.values = defaultdict(lambda: defaultdict(set)) # setting key --> str(setting value) --> {str(key), ...}
+
+        for key in processed_map:
+            key_str = str(key)
+            self.keys[key_str] = key
+            for k, v in key.settings.items():
+                self.values[k][f"{v}"].add(key_str)
+
+    def is_valid(self, processed_map):
+        return processed_map is self.processed_map and len(processed_map) == self.size
+
+    def get_keys(self, k, values):
+        if k not in self.values:
+            return set()
+
+        keys = set()
+        for v in values:
+            keys.update(self.values[k].get(f"{v}", ()))
+
+        return keys
+
+
 class MatrixDefinition():
     def __init__(self, is_lts=False):
         self.settings = defaultdict(set)
@@ -86,6 +130,8 @@ class MatrixDefinition():
         self.processed_map = {}
         self.is_lts = is_lts
 
+        self._records_index = None
+
     def settings_to_key(self, settings):
         return MatrixKey(settings)
 
@@ -133,18 +179,92 @@ class MatrixDefinition():
                     yield e
             return
 
-        for settings_values in sorted(itertools.product(*setting_lists), key=lambda x:x[0][0] if x else None):
+        if not all(setting_lists):
+            return # empty product
+
+        with timing_span("all_records"):
+            records = self._query_records_index(settings, setting_lists)
+
+        for settings_values, key in records:
             settings.update(dict(settings_values))
 
-            key = self.settings_to_key(settings)
-            try:
-                e = self.processed_map[key]
-            except KeyError: # missing experiment, ignore
-                continue
+            e = self.processed_map[key]
 
             if (gathered and e.is_gathered) or (not gathered and not e.is_gathered):
                 yield e
 
+        # leave the settings as the product enumeration did
+        settings.update(dict(setting_list[-1] for setting_list in setting_lists))
+
+    def _get_records_index(self):
+        if self._records_index is None or not self._records_index.is_valid(self.processed_map):
+            self._records_index = _RecordsIndex(self.processed_map)
+
+        return self._records_index
+
+    def _query_records_index(self, settings, setting_lists):
+        """
+        Returns the (settings_values, key) of the records matching the settings, where
+        settings_values is a combination of the setting_lists product.
+        The records are returned in the order of the product, without enumerating it.
+        """
+
+        index = self._get_records_index()
+
+        variables = [setting_list[0][0] for setting_list in setting_lists]
+
+        # intersect the keys matching each of the settings, the most selective first
+        constraints = [index.get_keys(k, [v]) for k, v in settings.items()
+                       if k not in variables and k != "stats"]
+        constraints += [index.get_keys(k, [v for _, v in setting_list])
+                        for k, setting_list in zip(variables, setting_lists) if k != "stats"]
+
+        if constraints:
+            constraints.sort(key=len)
+            candidates = set.intersection(*constraints)
+        else:
+            candidates = set(index.keys)
+
+        # the position of each value in its setting list
+        positions = []
+        for k, setting_list in zip(variables, setting_lists):
+            value_positions = defaultdict(list)
+            for pos, (_, v) in enumerate(setting_list):
+                value_positions[f"{v}"].append(pos)
+            positions.append(value_positions)
+
+        matches = []
+        for key_str in candidates:
+            key = index.keys[key_str]
+
+            candidate_positions = []
+            for k, setting_list, value_positions in zip(variables, setting_lists, positions):
+                if k == "stats": # not part of the key
+                    candidate_positions.append(range(len(setting_list)))
+                elif k in key.settings:
+                    candidate_positions.append(value_positions[f"{key.settings[k]}"])
+                else:
+                    candidate_positions = None
+                    break
+
+            if candidate_positions is None:
+                continue
+
+            for product_position in itertools.product(*candidate_positions):
+                settings_values = [setting_list[pos] for setting_list, pos in zip(setting_lists, product_position)]
+
+                # same check as the processed_map lookup
+                query_settings = dict(settings)
+                query_settings.update(dict(settings_values))
+                if str(self.settings_to_key(query_settings)) != key_str:
+                    continue
+
+                matches.append((product_position, settings_values, key))
+
+        matches.sort(key=lambda match: match[0])
+
+        return [(settings_values, key) for _, settings_values, key in matches]
+
     def get_record(self, settings):
         key = self.settings_to_key(settings)
 
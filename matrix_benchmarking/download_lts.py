@@ -4,6 +4,7 @@ import json
 import os, sys
 import pathlib
 import datetime
+import re
 import yaml
 
 import opensearchpy
@@ -15,6 +16,22 @@ import matrix_benchmarking.store as store
 
 LTS_ANCHOR_NAME = "source.lts.yaml"
 
+# the field used to track the most recent document downloaded
+WATERMARK_FIELD = "metadata.start"
+
+# prefix of the filter keys without an explicit document path
+FILTER_SETTINGS_PREFIX = "metadata.settings."
+
+FILTER_RANGE_OPERATORS = {
+    ">=": "gte",
+    "<=": "lte",
+    ">": "gt",
+    "<": "lt",
+}
+
+# longest operators first, so that '>=' isn't parsed as '>'
+FILTER_EXPRESSION_REGEX = re.compile(r"^([^<>=]+)(>=|<=|>|<|=)(.*)$")
+
 def main(opensearch_host: str = "",
          opensearch_port: str = "",
          opensearch_username: str = "",
@@ -25,6 +42,8 @@ def main(opensearch_host: str = "",
          max_records: int = 10000,
          force: bool = None,
          clean: bool = None,
+         incremental: bool = None,
+         fields: list[str] = [],
          ):
     """
 Download MatrixBenchmark result from OpenSearch
@@ -39,16 +58,18 @@ Args:
     opensearch_index: the OpenSearch index where the LTS payloads are stored (Mandatory)
 
     lts_results_dirname: The directory to place the downloaded LTS results files.
-    filters: If provided, only download the experiments matching the filters. Eg: {"image_name": "1.2"}. (Optional.)
+    filters: If provided, only download the experiments matching the filters. Eg: {"image_name": "1.2"}, or 'model=llama:granite,replicas>=2' to filter on the metadata.settings fields. (Optional.)
     max_records: Maximum number of records to retrieve from the OpenSearch instance. 10,000 is the largest number possible without paging (Optional.)
     force: Ignore the presence of the anchor file before downloading the results (Optional.)
     clean: Delete all the existing '.json' files in the lts-results-dirname before downloading the results (Optional.)
+    incremental: Only download the documents newer than the watermark recorded in the anchor file, and merge them into the existing directory (Optional.)
+    fields: If provided, only download these fields of the documents. Eg: metadata,kpis (Optional.)
     """
 
     kwargs = dict(locals()) # capture the function arguments
 
-    optionals_flags = ["filters", "max_records", "force", "clean"]
-    safe_flags = ["filters", "lts_results_dirname", "opensearch_index", "max_records", "force", "clean"]
+    optionals_flags = ["filters", "max_records", "force", "clean", "incremental", "fields"]
+    safe_flags = ["filters", "lts_results_dirname", "opensearch_index", "max_records", "force", "clean", "incremental", "fields"]
 
     cli_args.update_env_with_env_files()
     cli_args.update_kwargs_with_env(kwargs)
@@ -69,14 +90,22 @@ Args:
             kwargs.get("max_records"),
             kwargs.get("force"),
             kwargs.get("clean"),
+            kwargs.get("incremental"),
+            kwargs.get("fields"),
         )
 
     return cli_args.TaskRunner(run)
 
 
-def connect_opensearch_client(kwargs):
+def connect_opensearch_client(kwargs, pool_maxsize=None):
+    """
+    pool_maxsize: if set, the number of connections kept open to the server
+    """
+
     auth = (kwargs["opensearch_username"], kwargs["opensearch_password"])
 
+    connection_kwargs = dict(pool_maxsize=pool_maxsize) if pool_maxsize else {}
+
     client = OpenSearch(
         hosts=[{'host': kwargs["opensearch_host"], 'port': kwargs["opensearch_port"]}],
         timeout=60,
@@ -86,13 +115,148 @@ def connect_opensearch_client(kwargs):
         verify_certs=False,
         ssl_assert_hostname=False,
         ssl_show_warn=False,
+        **connection_kwargs,
     )
 
     return client
 
-def download(client, opensearch_index, filters, lts_results_dirname, max_records, force, clean):
+def parse_filter_expression(expression):
+    match = FILTER_EXPRESSION_REGEX.match(expression.strip())
+    if not match:
+        raise ValueError(f"Unexpected filter expression: {expression}")
+
+    key, operator, value = match.groups()
+
+    if range_operator := FILTER_RANGE_OPERATORS.get(operator):
+        return {"range": {get_filter_field(key.strip()): {range_operator: value.strip()}}}
+
+    value = value.replace("\\:", "<escaped colon>")
+    values = [v.replace("<escaped colon>", ":") for v in value.split(":")]
+
+    return build_terms_query(get_filter_field(key.strip()), values)
+
+
+def get_filter_field(key):
+    return key if "." in key else f"{FILTER_SETTINGS_PREFIX}{key}"
+
+
+def build_terms_query(field, value):
+    if not isinstance(value, list):
+        return {"term": {f"{field}.keyword": value}}
+
+    if len(value) == 1:
+        return {"term": {f"{field}.keyword": value[0]}}
+
+    return {"terms": {f"{field}.keyword": value}}
+
+
+def build_filters_query(filters):
+    if not filters:
+        return []
+
+    if isinstance(filters, dict):
+        return [build_terms_query(k, v) for k, v in filters.items()]
+
+    if isinstance(filters, str):
+        filters = filters.split(",")
+
+    return [parse_filter_expression(expression) for expression in filters if expression]
+
+
+def normalize_filters(filters):
+    """
+    Returns the filters as plain YAML-safe values (fire passes the
+    comma-separated lists as tuples), or None if there isn't any.
+    """
+
+    if not filters:
+        return None
+
+    if isinstance(filters, dict):
+        return {str(k): list(v) if isinstance(v, (list, tuple)) else v
+                for k, v in filters.items()}
+
+    if isinstance(filters, str):
+        filters = filters.split(",")
+
+    return [str(expression).strip() for expression in filters if str(expression).strip()] or None
+
+
+def normalize_fields(fields):
+    """
+    Returns the fields as a list of strings, or None if there isn't any.
+    """
+
+    if not fields:
+        return None
+
+    if isinstance(fields, str):
+        fields = fields.split(",")
+
+    return [str(field).strip() for field in fields if str(field).strip()] or None
+
+
+def build_source_fields(fields):
+    fields = normalize_fields(fields)
+    if not fields:
+        return None
+
+    # the watermark must always be downloaded
+    if not any(WATERMARK_FIELD == field or WATERMARK_FIELD.startswith(f"{field}.") for field in fields):
+        fields.append(WATERMARK_FIELD)
+
+    return fields
+
+
+def load_anchor(lts_results_dirname):
     lts_dir_anchor = lts_results_dirname / LTS_ANCHOR_NAME
-    if lts_dir_anchor.exists():
+    if not lts_dir_anchor.exists():
+        return None
+
+    with open(lts_dir_anchor) as f:
+        return yaml.safe_load(f)
+
+
+def get_document_watermark(document):
+    value = document
+    for key in WATERMARK_FIELD.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+
+    return value
+
+
+def download(client, opensearch_index, filters, lts_results_dirname, max_records, force, clean, incremental=False, fields=None):
+    lts_dir_anchor = lts_results_dirname / LTS_ANCHOR_NAME
+    watermark = None
+
+    filters = normalize_filters(filters)
+    fields = normalize_fields(fields)
+
+    if incremental:
+        if clean:
+            logging.critical("--incremental and --clean cannot be used together.")
+            return 1
+
+        anchor = load_anchor(lts_results_dirname)
+        if anchor is None:
+            logging.info(f"{lts_dir_anchor} does not exist, running a full download.")
+        elif anchor.get("index") != opensearch_index:
+            logging.critical(f"{lts_dir_anchor} was downloaded from index '{anchor.get('index')}', cannot update it from '{opensearch_index}'.")
+            return 1
+        elif normalize_filters(anchor.get("filters")) != filters:
+            logging.critical(f"{lts_dir_anchor} was downloaded with filters '{anchor.get('filters')}', cannot update it with '{filters}'.")
+            return 1
+        elif normalize_fields(anchor.get("fields")) != fields:
+            logging.critical(f"{lts_dir_anchor} was downloaded with fields '{anchor.get('fields')}', cannot update it with '{fields}'.")
+            return 1
+        else:
+            watermark = anchor.get("watermark")
+            if watermark is None:
+                logging.warning(f"{lts_dir_anchor} has no watermark, running a full download.")
+
+    elif lts_dir_anchor.exists():
         if not force:
             logging.critical(f"{lts_dir_anchor} already exists, cannot continue.")
             return 1
@@ -111,19 +275,41 @@ def download(client, opensearch_index, filters, lts_results_dirname, max_records
 
     lts_results_dirname.mkdir(exist_ok=True, parents=True)
 
-    logging.info(f"Querying OpenSearch {opensearch_index} ...")
+    if watermark is not None:
+        logging.info(f"Querying OpenSearch {opensearch_index} for documents newer than {watermark} ...")
+    else:
+        logging.info(f"Querying OpenSearch {opensearch_index} ...")
 
     query = {
         "size": max_records
     }
 
     # Restrict the results to specific settings
-    if filters:
+    try:
+        must = build_filters_query(filters)
+    except ValueError as e:
+        logging.critical(f"Invalid filters: {e}")
+        return 1
+
+    # Restrict the content of the documents to specific fields
+    if source_fields := build_source_fields(fields):
+        logging.info(f"Downloading only the fields {', '.join(source_fields)}")
+        query["_source"] = source_fields
+
+    # the documents at the watermark are downloaded again,
+    # so that the documents uploaded with the same timestamp aren't missed.
+    if incremental and watermark is not None:
+        must += [{"range": {WATERMARK_FIELD: {"gte": watermark}}}]
+
+    # oldest first, so that the watermark of a truncated response
+    # is the last document received, and the next incremental
+    # download continues from there.
+    query["sort"] = [{WATERMARK_FIELD: {"order": "asc"}}]
+
+    if must:
         query["query"] = {
             "bool": {
-                "must": [
-                    {"term": {f"{k}.keyword": v}} for k, v in filters.items()
-                ]
+                "must": must
             }
         }
 
@@ -135,23 +321,55 @@ def download(client, opensearch_index, filters, lts_results_dirname, max_records
 
     logging.info(f"Saving OpenSearch {opensearch_index} results ...")
 
+    hits = search["hits"]["hits"]
+
+    first_watermark = get_document_watermark(hits[0]["_source"]) if hits else None
+    last_watermark = get_document_watermark(hits[-1]["_source"]) if hits else None
+
+    if len(hits) == max_records and first_watermark is not None and first_watermark == last_watermark:
+        # the documents at the watermark are downloaded again (gte),
+        # so the next incremental downloads would receive the same documents
+        logging.critical(f"All the {max_records} documents received (--max-records) have the same {WATERMARK_FIELD} ({first_watermark}), "
+                         "the incremental downloads cannot move past it. Run the download again with a larger --max-records.")
+        return 1
+
+    if len(hits) == max_records:
+        logging.warning(f"Received {max_records} documents (--max-records), more documents may be available. "
+                        "Run the download again with --incremental to fetch them.")
+
+    saved = 0
+    new = 0
+    for hit in hits:
+        dest = lts_results_dirname / f"{opensearch_index}_{hit['_id']}.json"
+        if not dest.exists():
+            new += 1
+
+        with open(dest, "w") as f:
+            entry = hit["_source"]
+            json.dump(entry, f, indent=4)
+            print("", file=f) # add EOL
+
+        saved += 1
+
+    # the hits are sorted by watermark, the documents without one come last
+    for hit in reversed(hits):
+        document_watermark = get_document_watermark(hit["_source"])
+        if document_watermark is not None:
+            watermark = document_watermark
+            break
+
     with open(lts_dir_anchor, "w") as f:
         anchor = dict(
             index=opensearch_index,
             date=datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
             filters=filters,
+            fields=fields,
+            watermark=watermark,
         )
         yaml.dump(anchor, f, indent=4)
         print("", file=f) # add EOL
 
-    saved = 0
-    lts_results_dirname.mkdir(exist_ok=True, parents=True)
-    for hit in search["hits"]["hits"]:
-        with open(lts_results_dirname / f"{opensearch_index}_{hit['_id']}.json", "w") as f:
-            entry = hit["_source"]
-            json.dump(entry, f, indent=4)
-            print("", file=f) # add EOL
-
-        saved += 1
-
-    logging.info(f"Saved {saved} OpenSearch {opensearch_index} results.")
+    if incremental:
+        logging.info(f"Saved {saved} OpenSearch {opensearch_index} results ({new} new). Watermark: {watermark}")
+    else:
+        logging.info(f"Saved {saved} OpenSearch {opensearch_index} results.")
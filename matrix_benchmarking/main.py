@@ -11,14 +11,20 @@ except ModuleNotFoundError:
     logging.error("MatrixBenchmarking requires the Python `fire` package, see requirements.txt for a full list of requirements")
     sys.exit(1)
 
-import matrix_benchmarking.visualize
-import matrix_benchmarking.benchmark
-import matrix_benchmarking.parse
-import matrix_benchmarking.download
-import matrix_benchmarking.upload_lts
-import matrix_benchmarking.download_lts
-import matrix_benchmarking.generate_lts_schema
-import matrix_benchmarking.analyze_lts
+import importlib
+
+# the modules are only imported when their command runs,
+# to avoid loading the dependencies of all the commands
+COMMANDS = {
+    "benchmark": "matrix_benchmarking.benchmark",
+    "visualize": "matrix_benchmarking.visualize",
+    "parse": "matrix_benchmarking.parse",
+    "download": "matrix_benchmarking.download",
+    "upload_lts": "matrix_benchmarking.upload_lts",
+    "download_lts": "matrix_benchmarking.download_lts",
+    "generate_lts_schema": "matrix_benchmarking.generate_lts_schema",
+    "analyze_lts": "matrix_benchmarking.analyze_lts",
+}
 
 
 class MatrixBenchmarking:
@@ -26,24 +32,23 @@ class MatrixBenchmarking:
     Commands for launching MatrixBenchmarking
     """
 
-    def __init__(self):
-        self.benchmark = matrix_benchmarking.benchmark.main
-        self.visualize = matrix_benchmarking.visualize.main
-        self.parse = matrix_benchmarking.parse.main
-        self.download = matrix_benchmarking.download.main
-        self.upload_lts = matrix_benchmarking.upload_lts.main
-        self.download_lts = matrix_benchmarking.download_lts.main
-        self.generate_lts_schema = matrix_benchmarking.generate_lts_schema.main
-        self.analyze_lts = matrix_benchmarking.analyze_lts.main
+    def __init__(self, commands=COMMANDS):
+        for command in commands:
+            setattr(self, command, importlib.import_module(COMMANDS[command]).main)
 
 
 def main():
     # Print help rather than opening a pager
     fire.core.Display = lambda lines, out: print(*lines, file=out)
 
+    # Only load the command being executed.
+    # All of them are needed to list the commands in the help.
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    commands = [command] if command in COMMANDS else COMMANDS
+
     # Launch CLI, get a runnable
     runnable = None
-    runnable = fire.Fire(MatrixBenchmarking())
+    runnable = fire.Fire(MatrixBenchmarking(commands))
 
     # Run the actual workload
     if hasattr(runnable, "run"):
@@ -101,6 +101,7 @@ class KPI(ExclusiveModel):
     full_format: Optional[str] = Field(exclude=True)
     divisor: Optional[float] = Field(exclude=True)
     divisor_unit: Optional[str] = Field(exclude=True)
+    regression_method: Optional[str] = Field(exclude=True)
     #
 
     def __str__(self):
@@ -155,6 +156,29 @@ def HigherBetter(fct):
 
     return fct
 
+#
+# Receives the name of the regression analysis method to use for this KPI
+# eg: "zscore"
+#
+# Like the other regression settings, it is not exported with the LTS
+# payload: it is read from the KPIs of the reference (current) results.
+# The KPIs with an explicit method skip the screening method.
+#
+def RegressionMethod(method: str):
+    def decorator(fct):
+        mod = inspect.getmodule(fct)
+
+        name = fct.__name__
+
+        if name not in mod.KPIs:
+            raise KeyError(f"@RegressionMethod should come before @KPIMetadata() for {name}")
+
+        mod.KPIs[name]["regression_method"] = method
+
+        return fct
+
+    return decorator
+
 #
 # Receives a divisor to apply to the value before formatting it
 # 100, "MB"
@@ -245,6 +269,7 @@ def KPIMetadata(help, unit):
         mod.KPIs[name]["full_format"] = None
         mod.KPIs[name]["divisor"] = None
         mod.KPIs[name]["divisor_unit"] = None
+        mod.KPIs[name]["regression_method"] = None
         return fct
 
     return decorator
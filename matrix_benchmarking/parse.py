@@ -2,6 +2,7 @@ import os, sys
 import logging
 import json
 import functools
+import textwrap
 
 import matrix_benchmarking.store as store
 import matrix_benchmarking.common as common
@@ -34,6 +35,88 @@ def json_dumper(obj, strict=False):
         raise RuntimeError(f"No default serializer for object of type {obj.__class__}: {obj}")
 
 
+def to_json_dict(obj, strict=False):
+    """
+    Converts obj into plain JSON types (dict, list, str, int, float, bool, None),
+    in a single pass. Equivalent to json.loads(json.dumps(obj, default=json_dumper)),
+    without the intermediate string.
+    """
+
+    import datetime
+    import uuid
+
+    def encode_key(key):
+        if isinstance(key, str):
+            return str.__str__(key)
+        elif key is True:
+            return "true"
+        elif key is False:
+            return "false"
+        elif key is None:
+            return "null"
+        elif isinstance(key, (int, float)):
+            return json.dumps(key)
+
+        raise TypeError(f"keys must be str, int, float, bool or None, not {key.__class__.__name__}")
+
+    def encode(value):
+        if value is None or value is True or value is False:
+            return value
+
+        value_type = type(value)
+        if value_type in (str, int, float):
+            return value
+
+        if isinstance(value, dict):
+            return {encode_key(k): encode(v) for k, v in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [encode(v) for v in value]
+        elif isinstance(value, str):
+            return str.__str__(value)
+        elif isinstance(value, int):
+            return int(value)
+        elif isinstance(value, float):
+            return float(value)
+        elif isinstance(value, datetime.datetime):
+            return value.isoformat()
+        elif isinstance(value, uuid.UUID):
+            return str(value)
+
+        return encode(json_dumper(value, strict=strict))
+
+    return encode(obj)
+
+
+def generate_lts_payload_dicts(workload_store):
+    """
+    Generates the LTS payloads of the workload one at a time, as plain JSON dicts.
+    """
+
+    for payload, _, __ in workload_store.build_lts_payloads():
+        yield to_json_dict(payload)
+
+
+def dump_json_list(iterable, file, indent=None):
+    """
+    Writes the elements of iterable as a JSON list, one element at a time.
+    Same output as json.dump(list(iterable), file, indent=indent).
+    """
+
+    empty = True
+    for element in iterable:
+        element_json = json.dumps(element, indent=indent)
+        if indent is None:
+            print("[" if empty else ", ", element_json, sep="", end="", file=file)
+        else:
+            print("[\n" if empty else ",\n", textwrap.indent(element_json, " " * indent), sep="", end="", file=file)
+        empty = False
+
+    if empty:
+        print("[]", end="", file=file)
+    else:
+        print("" if indent is None else "\n", "]", sep="", end="", file=file)
+
+
 def main(workload: str = "",
          workload_base_dir: str = "",
          results_dirname: str = "",
@@ -44,6 +127,7 @@ def main(workload: str = "",
          output_matrix: str = "",
          pretty: bool = True,
          lts: bool = False,
+         ndjson: bool = False,
          ):
     """
 Run MatrixBenchmarking results parsing.
@@ -70,6 +154,7 @@ Args:
     output_lts: Output the parsed LTS results into a specified file, or to stdout if '-' is supplied
     output_matrix: Output the internal entry matrix into a specified file, or to stdout if '-' is supplied
     lts: If 'True', invoke the LTS parser only.
+    ndjson: If 'True', output the LTS results one payload per line (NDJSON), instead of a JSON list.
 """
 
     kwargs = dict(locals()) # capture the function arguments
@@ -124,15 +209,18 @@ Args:
             if kwargs['pretty']:
                 indent = 4
 
-            parsed_results = []
-            for payload, _, __ in workload_store.build_lts_payloads():
-                parsed_results.append(payload)
+            # the payloads are generated, encoded and written one at a time
+            payload_dicts = generate_lts_payload_dicts(workload_store)
 
             file = None
             try:
                 file = sys.stdout if kwargs["output_lts"] == '-' else open(kwargs["output_lts"], "w")
-                json.dump(parsed_results, file, indent=indent, default=functools.partial(json_dumper, strict=False))
-                print("", file=file)
+                if kwargs["ndjson"]:
+                    for payload_dict in payload_dicts:
+                        print(json.dumps(payload_dict), file=file)
+                else:
+                    dump_json_list(payload_dicts, file, indent=indent)
+                    print("", file=file)
             finally:
                 if file:
                     file.close()
@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+import bisect
+import threading
+import contextlib
+
+import matrix_benchmarking.common as common
+
+#
+# Latency instrumentation of the visualizer.
+#
+# The spans measure the time spent in the main steps of the figure
+# generation (all_records queries, stat processing, do_plot, ...).
+# Their durations are aggregated in per-span and per-stat histograms,
+# exported in the Prometheus text format (see web.py /matrix/metrics).
+#
+# The spans are inclusive: the stat processing time is also part of
+# the do_plot time, which is part of the graph_figure time.
+#
+# The time spent by Dash after the graph_figure callback, mostly to
+# encode the figure in JSON, is measured as the 'serialize' span.
+#
+# With MATBENCH_VISUALIZE_SERVER_TIMING=1, the durations of the spans
+# of a request are also sent in its Server-Timing header.
+#
+# The all_records queries of common.py are measured through its
+# timing_span hook, which this module sets when it is loaded.
+#
+
+ENABLED = os.environ.get("MATBENCH_VISUALIZE_METRICS", "1") in ("1", "y", "yes", "true", "True")
+
+SERVER_TIMING = os.environ.get("MATBENCH_VISUALIZE_SERVER_TIMING", "0") in ("1", "y", "yes", "true", "True")
+
+METRIC_NAME = "matbench_visualizer_span_seconds"
+
+# in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# the request attribute (flask.g) where the spans of the request are stored
+REQUEST_SPANS_ATTR = "matbench_spans"
+
+
+class Histogram():
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1) # the last one is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, duration):
+        self.counts[bisect.bisect_left(BUCKETS, duration)] += 1
+        self.sum += duration
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms = {} # (span, stat) --> Histogram
+
+
+def _get_request_spans():
+    # flask is only loaded when the visualizer runs
+    flask = sys.modules.get("flask")
+    if flask is None or not flask.has_request_context():
+        return None
+
+    spans = getattr(flask.g, REQUEST_SPANS_ATTR, None)
+    if spans is None:
+        spans = []
+        setattr(flask.g, REQUEST_SPANS_ATTR, spans)
+
+    return spans
+
+
+def observe(name, duration, stat=None):
+    """
+    Records the duration (in seconds) of a span.
+    """
+
+    if not ENABLED:
+        return
+
+    with _lock:
+        histogram = _histograms.get((name, stat))
+        if histogram is None:
+            histogram = _histograms[(name, stat)] = Histogram()
+
+        histogram.observe(duration)
+
+    request_spans = _get_request_spans()
+    if request_spans is not None:
+        request_spans.append((name, duration, stat))
+
+
+@contextlib.contextmanager
+def span(name, stat=None):
+    """
+    Measures the duration of the block.
+    """
+
+    if not ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, stat)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def to_prometheus():
+    """
+    Returns the histograms in the Prometheus text format.
+    """
+
+    lines = [
+        f"# HELP {METRIC_NAME} Duration of the visualizer operations.",
+        f"# TYPE {METRIC_NAME} histogram",
+    ]
+
+    with _lock:
+        histograms = [(key, list(histogram.counts), histogram.sum, histogram.count)
+                      for key, histogram in sorted(_histograms.items(), key=lambda item: (item[0][0], item[0][1] or ""))]
+
+    for (name, stat), counts, duration_sum, count in histograms:
+        labels = f'span="{_escape(name)}"' + (f',stat="{_escape(stat)}"' if stat is not None else "")
+
+        cumulative = 0
+        for bucket, bucket_count in zip(list(BUCKETS) + ["+Inf"], counts):
+            cumulative += bucket_count
+            lines.append(f'{METRIC_NAME}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+
+        lines.append(f"{METRIC_NAME}_sum{{{labels}}} {duration_sum}")
+        lines.append(f"{METRIC_NAME}_count{{{labels}}} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def get_server_timing():
+    """
+    Returns the Server-Timing header value of the current request, or
+    None if there isn't any span to report. The durations of the spans
+    with the same name are summed.
+    """
+
+    request_spans = _get_request_spans()
+    if not request_spans:
+        return None
+
+    durations = {}
+    for name, duration, _ in request_spans:
+        durations[name] = durations.get(name, 0) + duration
+
+    return ", ".join(f"{name};dur={duration * 1000:.1f}" for name, duration in durations.items())
+
+
+def get_request_spans():
+    """
+    Returns the (name, duration, stat) spans of the current request.
+    """
+
+    return _get_request_spans() or []
+
+
+common.timing_span = span
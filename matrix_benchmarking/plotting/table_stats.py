@@ -1,9 +1,12 @@
 from collections import defaultdict
+import collections.abc
 import datetime
 import logging
+import os
 
 import statistics
 
+import numpy as np
 import plotly.graph_objs as go
 from dash import html
 from dash import dcc
@@ -11,6 +14,13 @@ from dash import dcc
 import matrix_benchmarking.common as common
 from matrix_benchmarking.common import Matrix
 from matrix_benchmarking import plotting
+import matrix_benchmarking.plotting.metrics as metrics
+
+# above this number of points, the TableStats plots are rendered with WebGL
+WEBGL_POINTS = int(os.environ.get("MATBENCH_PLOTTING_WEBGL_POINTS", 5000))
+
+# above this number of points, the TableStats traces are downsampled (0: never)
+MAX_POINTS = int(os.environ.get("MATBENCH_PLOTTING_MAX_POINTS", 2000))
 
 def register_all():
     for stat in TableStats.all_stats:
@@ -18,16 +28,314 @@ def register_all():
 
         if not isinstance(stat, TableStats): continue
 
-        for entry in common.Matrix.processed_map.values():
-            if not entry.is_gathered:
-                entry.stats[stat.name] = stat.process(entry)
+        TableStats.processed_stats.add(stat.name)
+
+    # the stats are only computed when a plot accesses them
+    for entry in common.Matrix.processed_map.values():
+        entry.stats = EntryStats(entry, entry.stats)
+
+
+def get_categories(series):
+    """
+    Returns the position of the x categories, in the order of first
+    appearance (the order of the plotly category axes).
+    """
+
+    categories = {}
+    for xs in series:
+        for _x in xs:
+            if _x is None: continue
+            categories.setdefault(_x, len(categories))
+
+    return categories
+
+
+def has_stdev(y_error):
+    """
+    Returns True if the stdev of a point ([stdev] or [above, below]) can be plotted.
+    """
+
+    return bool(y_error) and None not in y_error
+
+
+def _select(x, y, y_err, indexes):
+    # drops the None separators at the ends, and the consecutive ones
+    selected = []
+    for idx in indexes:
+        if x[idx] is None and (not selected or x[selected[-1]] is None):
+            continue
+        selected.append(idx)
+
+    if selected and x[selected[-1]] is None:
+        selected.pop()
+
+    return [x[i] for i in selected], [y[i] for i in selected], [y_err[i] for i in selected]
+
+
+def select_window(x, y, y_err, categories, first, last):
+    """
+    Keeps the points between the 'first' and 'last' categories.
+    """
+
+    lo, hi = categories[first], categories[last]
+
+    return _select(x, y, y_err, [idx for idx, _x in enumerate(x)
+                                 if _x is None or lo <= categories[_x] <= hi])
+
+
+def select_categories(x, y, y_err, categories):
+    """
+    Keeps the points of the 'categories'.
+    """
+
+    return _select(x, y, y_err, [idx for idx, _x in enumerate(x)
+                                 if _x is None or _x in categories])
+
+
+def downsample_min_max(x, y, y_err, max_points):
+    """
+    Reduces the series to at most 'max_points' points (plus the None
+    separators), by keeping the minimum and maximum values of
+    max_points/2 buckets, in their original order.
+    """
+
+    if max_points <= 0 or len(y) <= max_points:
+        return x, y, y_err
+
+    bucket_count = max(max_points // 2, 1)
+    bucket_size = len(y) / bucket_count
+
+    indexes = [idx for idx, _x in enumerate(x) if _x is None]
+    for bucket in range(bucket_count):
+        bucket_indexes = [idx for idx in range(int(bucket * bucket_size), int((bucket + 1) * bucket_size))
+                          if y[idx] is not None]
+        if not bucket_indexes: continue
+
+        indexes.append(min(bucket_indexes, key=y.__getitem__))
+        indexes.append(max(bucket_indexes, key=y.__getitem__))
+
+    return _select(x, y, y_err, sorted(set(indexes)))
+
+
+class EntryStats(collections.abc.MutableMapping):
+    """
+    The stats of a matrix entry. The stat values are created on their
+    first access, and memoized.
+    """
+
+    def __init__(self, entry, stats=None):
+        self.entry = entry
+        self.stats = dict(stats or {})
+
+    def _process(self, name):
+        stat = TableStats.stats_by_name[name]
+
+        if not self.entry.is_gathered:
+            return stat.process(self.entry)
+
+        if stat.process_gathered:
+            # the stat aggregates the gathered entries
+            return [stat.process(self.entry)]
+
+        return [stat.process(gathered_entry)
+                for gathered_entry in self.entry.results
+                if gathered_entry.results]
+
+    def __getitem__(self, name):
+        try:
+            return self.stats[name]
+        except KeyError:
+            if name not in TableStats.processed_stats:
+                raise
+
+        self.stats[name] = value = self._process(name)
+
+        return value
+
+    def __setitem__(self, name, value):
+        self.stats[name] = value
+
+    def __delitem__(self, name):
+        del self.stats[name]
+
+    def __contains__(self, name):
+        return name in self.stats or name in TableStats.processed_stats
+
+    def __iter__(self):
+        yield from self.stats
+        yield from (name for name in TableStats.processed_stats if name not in self.stats)
+
+    def __len__(self):
+        return len(self.stats.keys() | TableStats.processed_stats)
+
+
+class FutureValue():
+    """
+    The value of a stat for an entry, computed on its first access.
+    """
+
+    def __init__(self, stat, entry):
+        self.stat = stat
+        self.entry = entry
+
+        self.computed = False
+        self._value = None
+        self._stdev = None
+
+    @property
+    def value(self):
+        if self._value is not None: return self._value
+
+        stat = self.stat
+        try:
+            with metrics.span("stat_process", stat.name):
+                v = stat.do_process(self.entry)
+        except Exception as e:
+            logging.error(f"Failed to process field '{stat.field}' with"
+                          f"{stat.do_process.__self__.__class__.__name__}.{stat.do_process.__name__}:")
+            logging.error(f"{e.__class__.__name__}:{e}")
+            raise e
+
+        try: self._value, *self._stdev = v
+        except TypeError: # cannot unpack non-iterable ... object
+            self._value = v
+
+        return self._value
+
+    @property
+    def stdev(self):
+        if self._value is not None:
+            _not_used = self.value # force trigger the computation
+
+        return self._stdev
+
+    def __str__(self):
+        stat = self.stat
+        if self.value is None: return "N/A"
+
+        val = f"{self.value:{stat.fmt}}{stat.unit}"
+        if not self.stdev:
+            pass
+        elif len(self.stdev) == 1:
+            if self.stdev[0] is not None:
+                val += f" +/- {self.stdev[0]:{stat.fmt}}{stat.unit}"
+        elif len(self.stdev) == 2:
+            if self.stdev[0] is not None:
+                val += f" + {self.stdev[0]:{stat.fmt}}"
+            if self.stdev[1] is not None:
+                val += f" - {self.stdev[1]:{stat.fmt}}"
+            val += str(stat.unit)
+        return val
+
+
+class GatheredStats():
+    """
+    Statistics of the values of the gathered entries, computed on
+    demand, in a single vectorized pass over the entries being added.
+
+    The values of all the groups are stored in one array, sorted by
+    group and value, so that the percentiles are read by index.
+
+    A gathered entry whose values cannot be processed only fails its
+    own statistics.
+    """
+
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self, stat):
+        self.stat = stat
+        # id(entry) --> (entry, dict of the stats, or the processing exception)
+        self.results = {}
+
+    def __contains__(self, entry):
+        return id(entry) in self.results
+
+    def _get_values(self, entry):
+        values = []
+        for gathered_entry in entry.results:
+            value = self.stat.process_value_dev(gathered_entry)[0]
+            if value is None: continue
+
+            # fails here, for this entry only, if the value isn't numeric
+            values.append(float(value))
+
+        return values
+
+    def add(self, gathered_entries):
+        """
+        Computes the statistics of the gathered entries not computed yet.
+        """
+
+        computed_entries = []
+        groups = []
+        values = []
+        for entry in gathered_entries:
+            if entry in self: continue
+
+            try:
+                entry_values = self._get_values(entry)
+            except Exception as e:
+                self.results[id(entry)] = (entry, e)
+                continue
+
+            groups += [len(computed_entries)] * len(entry_values)
+            values += entry_values
+            computed_entries.append(entry)
+
+        if not computed_entries:
+            return
+
+        nb_groups = len(computed_entries)
+        groups = np.array(groups, dtype=int)
+        values = np.array(values, dtype=float)
+
+        order = np.lexsort((values, groups))
+        groups = groups[order]
+        values = values[order]
+
+        count = np.bincount(groups, minlength=nb_groups)
+        start = np.concatenate(([0], np.cumsum(count)[:-1]))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.bincount(groups, weights=values, minlength=nb_groups) / count
+
+            square_dist = np.bincount(groups, weights=(values - mean[groups]) ** 2, minlength=nb_groups)
+            stdev = np.where(count > 2, np.sqrt(square_dist / (count - 1)), 0)
+
+        # linear interpolation between the closest ranks, like numpy.percentile
+        percentiles = {}
+        has_values = count > 0
+        last_value = max(len(values) - 1, 0)
+        for percentile in self.PERCENTILES:
+            if not len(values):
+                percentiles[percentile] = np.full(nb_groups, np.nan)
                 continue
 
-            entry.stats[stat.name] = gathered_stats = []
-            for gathered_entry in entry.results:
-                if not gathered_entry.results: continue
+            position = np.maximum(count - 1, 0) * percentile / 100
+            lower = np.floor(position).astype(int)
+            fraction = position - lower
+
+            lower_values = values[np.minimum(start + lower, last_value)]
+            upper_values = values[np.minimum(start + lower + (fraction > 0), last_value)]
+
+            percentiles[percentile] = np.where(has_values, lower_values + (upper_values - lower_values) * fraction, np.nan)
+
+        for idx, entry in enumerate(computed_entries):
+            entry_stats = dict(count=int(count[idx]), mean=float(mean[idx]), stdev=float(stdev[idx]))
+            entry_stats.update({percentile: float(percentile_values[idx])
+                                for percentile, percentile_values in percentiles.items()})
+
+            self.results[id(entry)] = (entry, entry_stats)
 
-                gathered_stats.append(stat.process(gathered_entry))
+    def get(self, entry, name):
+        _, entry_stats = self.results[id(entry)]
+        if isinstance(entry_stats, Exception):
+            raise entry_stats
+
+        if not entry_stats["count"]:
+            raise statistics.StatisticsError(f"no gathered value to compute the {name}")
+
+        return entry_stats[name]
 
 
 class TableStats():
@@ -35,6 +343,8 @@ class TableStats():
     stats_by_name = {}
     stats_by_id = {}
     graph_figure = None
+    # names of the stats computed by TableStats.process
+    processed_stats = set()
 
     @classmethod
     def _register_stat(clazz, stat_obj):
@@ -59,6 +369,9 @@ class TableStats():
         self.kwargs = kwargs
 
         self.do_process = None
+        # if True, the gathered entries are processed as a whole, instead of entry by entry
+        self.process_gathered = False
+        self.gathered_stats = None
 
         TableStats._register_stat(self)
 
@@ -94,67 +407,60 @@ class TableStats():
         obj.do_process = obj.process_mean_std
         return obj
 
+    @classmethod
+    def Percentile(clazz, *args, percentile, **kwargs):
+        if percentile not in GatheredStats.PERCENTILES:
+            raise ValueError(f"Percentile {percentile} not supported. Supported percentiles: {GatheredStats.PERCENTILES}")
+
+        obj = clazz(*args, **kwargs)
+        obj.percentile = percentile
+        obj.do_process = obj.process_percentile
+        obj.process_gathered = True
+        return obj
+
+    @classmethod
+    def P50(clazz, *args, **kwargs):
+        return clazz.Percentile(*args, percentile=50, **kwargs)
+
+    @classmethod
+    def P90(clazz, *args, **kwargs):
+        return clazz.Percentile(*args, percentile=90, **kwargs)
+
+    @classmethod
+    def P99(clazz, *args, **kwargs):
+        return clazz.Percentile(*args, percentile=99, **kwargs)
+
     def process(self, entry):
-        class FutureValue():
-            def __init__(self):
-                self.computed = False
-                self._value = None
-                self._stdev = None
-
-            @property
-            def value(myself):
-                if myself._value is not None: return myself._value
-                try:
-                    v = self.do_process(entry)
-                except Exception as e:
-                    logging.error(f"Failed to process field '{self.field}' with"
-                                  f"{self.do_process.__self__.__class__.__name__}.{self.do_process.__name__}:")
-                    logging.error(f"{e.__class__.__name__}:{e}")
-                    raise e
-
-                try: myself._value, *myself._stdev = v
-                except TypeError: # cannot unpack non-iterable ... object
-                    myself._value = v
-
-                return myself._value
-
-            @property
-            def stdev(myself):
-                if myself._value is not None:
-                    _not_used = myself.value # force trigger the computation
-
-                return myself._stdev
-
-            def __str__(myself):
-                if myself.value is None: return "N/A"
-
-                val = f"{myself.value:{self.fmt}}{self.unit}"
-                if not myself.stdev:
-                    pass
-                elif len(myself.stdev) == 1:
-                    if myself.stdev[0] is not None:
-                        val += f" +/- {myself.stdev[0]:{self.fmt}}{self.unit}"
-                elif len(myself.stdev) == 2:
-                    if myself.stdev[0] is not None:
-                        val += f" + {myself.stdev[0]:{self.fmt}}"
-                    if myself.stdev[1] is not None:
-                        val += f" - {myself.stdev[1]:{self.fmt}}"
-                    val += str(self.unit)
-                return val
-
-        return FutureValue()
+        return FutureValue(self, entry)
+
+    def get_gathered_stats(self, entry):
+        if self.gathered_stats is None:
+            self.gathered_stats = GatheredStats(self)
+
+        if entry not in self.gathered_stats:
+            # only the requested entries are computed, see TableStats.process
+            self.gathered_stats.add([entry])
+
+        return self.gathered_stats
 
     def process_gathered_value_dev(self, entry):
-        values = [self.process_value_dev(gathered_entry)[0]
-                  for gathered_entry in entry.results]
-        values = [v for v in values if v is not None]
+        gathered_stats = self.get_gathered_stats(entry)
 
-        mean = statistics.mean(values) / self.divisor
+        mean = gathered_stats.get(entry, "mean") / self.divisor
 
-        stdev = statistics.stdev(values) if len(values) > 2 else 0
+        stdev = gathered_stats.get(entry, "stdev")
 
         return mean, (stdev / self.divisor)
 
+    def process_percentile(self, entry):
+        if not entry.is_gathered:
+            # the percentile of a single value
+            value, _ = self.process_value_dev(entry)
+            return value, None
+
+        # no stdev: a percentile doesn't have error bands
+        return self.get_gathered_stats(entry).get(entry, self.percentile) / self.divisor, None
+
     def process_value_dev(self, entry):
         if entry.is_gathered:
             return self.process_gathered_value_dev(entry)
@@ -365,8 +671,12 @@ class TableStats():
         # ---
 
         def prepare_scatter(legend_key, color):
+            if use_webgl:
+                plot_args['type'] = 'scattergl'
+
             if var_length < 5:
-                plot_args['type'] = 'line'
+                if not use_webgl:
+                    plot_args['type'] = 'line'
                 plot_args['line'] = dict(color=color)
             else:
                 plot_args['mode'] = 'markers'
@@ -376,7 +686,7 @@ class TableStats():
             y_err_above = [];  y_err_below = []
             for _y, _y_error in zip(y[legend_key], y_err[legend_key]):
                 # above == below iff len(_y_error) == 1
-                if None in (_y, _y_error): continue
+                if _y is None or not has_stdev(_y_error): continue
 
                 y_err_above.append(_y+_y_error[0])
                 y_err_below.append(_y-_y_error[-1])
@@ -396,7 +706,7 @@ class TableStats():
                                         y_err[legend_key] + [None]):
 
                 if _x is not None:
-                    if None not in (_y, _y_error):
+                    if _y is not None and has_stdev(_y_error):
                         # above == below iff len(_y_error) == 1
                         y_err_above.append(_y+_y_error[0])
                         y_err_below.append(_y-_y_error[-1])
@@ -420,7 +730,7 @@ class TableStats():
         def plot_scatter_err(legend_key, err_data, y_max):
             x_err_data, y_err_data = err_data
 
-            data.append(go.Scatter(
+            data.append((go.Scattergl if use_webgl else go.Scatter)(
                 x=x_err_data, y=y_err_data,
                 legendgroup=legend_name + ("(stdev)" if var_length >= 4 else ""),
                 showlegend=False, hoverinfo="skip",
@@ -436,10 +746,76 @@ class TableStats():
         legend_names = sorted(list(legend_names), key=plotting.natural_keys)
 
         DO_LOCAL_SORT = True
+        for legend_key in legend_keys:
+            if var_length >= 5 and DO_LOCAL_SORT:
+                # sort x according to y's value order
+                x[legend_key] = [_x for _y, _x in sorted(zip(y[legend_key], x[legend_key]),
+                                                             key=lambda v: (v[0] is None, v[0]))]
+                # sort y by value (that may be None)
+                y[legend_key].sort(key=lambda x: (x is None, x))
+                if not layout.title.text.endswith(" (sorted)"):
+                    layout.title.text += " (sorted)"
+
+        # ---
+
+        # only the points of the zoomed window, sent by the zoom callback
+        x_window = cfg.get('stats.x_window', None)
+        if x_window:
+            window_ax, first, last = x_window
+            window_keys = [legend_key for legend_key in legend_keys if subplots[legend_key[1]] == window_ax]
+
+            categories = get_categories(x[legend_key] for legend_key in window_keys)
+            if first in categories and last in categories:
+                for legend_key in window_keys:
+                    x[legend_key], y[legend_key], y_err[legend_key] = \
+                        select_window(x[legend_key], y[legend_key], y_err[legend_key], categories, first, last)
+            else:
+                logging.warning(f"Zoom window {x_window} not found in the plot, ignoring it.")
+                x_window = None
+
+        max_points = int(cfg.get('stats.max_points', MAX_POINTS))
+        downsampled = False
+        for ax in sorted(set(subplots.values()), key=lambda x: int(x[1:])):
+            ax_keys = [legend_key for legend_key in legend_keys if subplots[legend_key[1]] == ax]
+            if max_points <= 0 or sum(len(y[legend_key]) for legend_key in ax_keys) <= max_points:
+                continue
+
+            # the traces of an axis must keep the same categories, otherwise
+            # plotly orders the categories by first appearance in the traces.
+            # Keep the union of the min/max categories of all the traces.
+            categories = get_categories(x[legend_key] for legend_key in ax_keys)
+            trace_max_points = max(max_points // len(ax_keys), 2)
+
+            kept_categories = set()
+            for legend_key in ax_keys:
+                kept_x, _, _ = downsample_min_max(x[legend_key], y[legend_key], y_err[legend_key], trace_max_points)
+                kept_categories.update(kept_x)
+            kept_categories.discard(None)
+
+            for legend_key in ax_keys:
+                x[legend_key], y[legend_key], y_err[legend_key] = \
+                    select_categories(x[legend_key], y[legend_key], y_err[legend_key], kept_categories)
+
+            axis = "xaxis" + ax[1:]
+            layout[axis].categoryorder = "array"
+            layout[axis].categoryarray = [category for category in categories if category in kept_categories]
+
+            downsampled = True
+
+        if downsampled:
+            layout.title.text += " (downsampled)"
+
+        if downsampled or x_window:
+            # the zoom callback reloads the full resolution of the window
+            layout.meta = dict(name=self.name, reload_on_zoom=True),
+
+        webgl_points = int(cfg.get('stats.webgl_points', WEBGL_POINTS))
+        use_webgl = sum(len(y[legend_key]) for legend_key in legend_keys) > webgl_points
+
         for legend_key in legend_keys:
             legend_name, subplots_key = legend_key
             ax = subplots[subplots_key]
-            has_err = any(y_err[legend_key])
+            has_err = any(has_stdev(_y_error) for _y_error in y_err[legend_key])
 
             color = plotting.COLORS(list(legend_names).index(legend_name))
             plot_args = dict()
@@ -461,15 +837,6 @@ class TableStats():
                     y_max = plot_scatter_err(legend_key, err_data, y_max)
 
 
-            if var_length >= 5 and DO_LOCAL_SORT:
-                # sort x according to y's value order
-                x[legend_key] = [_x for _y, _x in sorted(zip(y[legend_key], x[legend_key]),
-                                                             key=lambda v: (v[0] is None, v[0]))]
-                # sort y by value (that may be None)
-                y[legend_key].sort(key=lambda x: (x is None, x))
-                if not layout.title.text.endswith(" (sorted)"):
-                    layout.title.text += " (sorted)"
-
             # if 2 >= var_length > 5:
             #   need to sort and don't move the None location
             #   need to sort yerr as well
@@ -1,9 +1,11 @@
 import types, importlib
+import math
 import urllib.parse
 import datetime
 import sys
 import logging
 import traceback
+import time
 
 logging.info("Loading dash ...")
 import dash
@@ -14,9 +16,12 @@ import plotly.graph_objs as go
 import flask
 logging.info("Loading dash ... done")
 
-from matrix_benchmarking.plotting.table_stats import TableStats
+from matrix_benchmarking.plotting.table_stats import TableStats, get_categories
 from matrix_benchmarking.common import Matrix
 from matrix_benchmarking import plotting
+import matrix_benchmarking.plotting.metrics as metrics
+from matrix_benchmarking.plotting.ui import figure_cache
+from matrix_benchmarking.plotting.ui import figure_encoding
 
 NB_GRAPHS = 3
 GRAPH_IDS = [f"graph-{i}" for i in range(NB_GRAPHS)]
@@ -202,6 +207,60 @@ def build_layout(search, serializing=False):
         html.P(id="graph-hover-info"),
     ])
 
+def get_zoom_window(relayout, figure):
+    """
+    Returns the x axis and the first and last x categories of the
+    zoomed window, () when the zoom is reset, or None if the figure
+    doesn't need to be reloaded.
+    """
+
+    if not relayout or not figure:
+        return None
+
+    meta = figure['layout'].get('meta')
+    if isinstance(meta, list): meta = meta[0]
+
+    if not (meta and meta.get('reload_on_zoom')):
+        return None
+
+    if any(key.endswith(".autorange") for key in relayout):
+        return ()
+
+    range_key = next((key for key in relayout if key.endswith(".range[0]")), None)
+    if not range_key or not range_key.startswith("xaxis"):
+        return None # not a zoom of an x axis
+
+    axis = range_key.partition(".")[0]
+    x_range = relayout[range_key], relayout.get(f"{axis}.range[1]")
+    if x_range[1] is None:
+        return None
+
+    # the first axis is 'x' in the figure, and 'x1' in do_plot
+    ax_number = axis.removeprefix("xaxis") or "1"
+
+    # the downsampled axes have an explicit category order
+    categories = figure['layout'].get(axis, {}).get('categoryarray')
+    if not categories:
+        categories = list(get_categories(trace.get('x', []) for trace in figure['data']
+                                         if ((trace.get('xaxis') or "x").removeprefix("x") or "1") == ax_number))
+
+    first = max(math.ceil(x_range[0]), 0)
+    last = min(math.floor(x_range[1]), len(categories) - 1)
+    if first > last:
+        return None
+
+    return f"x{ax_number}", categories[first], categories[last]
+
+def get_graph_stat_name(settings_values, graph_idx):
+    stats_values = dict(zip(Matrix.settings.keys(), settings_values)).get("stats")
+    if not isinstance(stats_values, list):
+        stats_values = [stats_values]
+
+    try:
+        return stats_values[graph_idx]
+    except IndexError:
+        return None
+
 def build_callbacks(app):
     # Dash doesn't support creating the callbacks AFTER the app is running,
     # can the Matrix callback IDs are dynamic (base on the name of the settings)
@@ -229,6 +288,33 @@ def build_callbacks(app):
 
         return resp
 
+    @app.server.route('/matrix/metrics')
+    def get_metrics():
+        return flask.Response(metrics.to_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    @app.server.before_request
+    def start_request_timing():
+        flask.g.matbench_request_start = time.perf_counter()
+
+    @app.server.after_request
+    def finish_request_timing(response):
+        graph_spans = [(duration, stat) for name, duration, stat in metrics.get_request_spans()
+                       if name in ("graph_figure", "graph_zoom")]
+
+        start = flask.g.get("matbench_request_start")
+        if graph_spans and start is not None:
+            # the time spent by Dash outside of the callback, mostly encoding the figure
+            elapsed = time.perf_counter() - start
+            metrics.observe("serialize", max(elapsed - sum(duration for duration, _ in graph_spans), 0),
+                            graph_spans[0][1])
+
+        if metrics.SERVER_TIMING:
+            server_timing = metrics.get_server_timing()
+            if server_timing:
+                response.headers["Server-Timing"] = server_timing
+
+        return response
+
     app.clientside_callback(
         ClientsideFunction(namespace="clientside", function_name="resize_graph"),
         Output("text-box:clientside-output", "children"),
@@ -388,9 +474,35 @@ def build_callbacks(app):
                           [State('custom-config-saved', 'data-label')]
             )
             def graph_figure_cb(*args):
-                return graph_figure(*args)
-
-            def graph_figure(*_args):
+                with metrics.span("graph_figure", get_graph_stat_name(args, graph_idx)):
+                    return graph_figure(*args)
+
+            if graph_id != "graph-for-dl":
+                # reloads the downsampled figures at full resolution when zooming.
+                # The States after the figure are the arguments of graph_figure.
+                @app.callback(Output(graph_id, 'figure', allow_duplicate=True),
+                              [Input(graph_id, 'relayoutData')],
+                              [State(graph_id, 'figure')]
+                              +[State(f"list-settings-{sanitize_setting_key(key)}", "value") for key in Matrix.settings]
+                              +[State("lbl_settings", "n_clicks")]
+                              +[State('settings-order', 'data-order')]
+                              +[State('config-title', 'n_clicks'),
+                                State('custom-config', 'value'),
+                                State('custom-config-saved', 'data-label'),
+                                State('custom-config-saved', 'data-label')],
+                              prevent_initial_call=True
+                )
+                def graph_zoom_cb(relayout, figure, *args):
+                    x_window = get_zoom_window(relayout, figure)
+                    if x_window is None:
+                        return dash.no_update
+
+                    with metrics.span("graph_zoom", get_graph_stat_name(args, graph_idx)):
+                        plot, _ = graph_figure(*args, x_window=x_window)
+
+                    return plot
+
+            def graph_figure(*_args, x_window=None):
 
                 try: triggered_id = dash.callback_context.triggered[0]["prop_id"]
                 except IndexError:
@@ -425,6 +537,9 @@ def build_callbacks(app):
                     v = int(v) if v.isdigit() else v
                     cfg.d[k] = v
 
+                if x_window:
+                    cfg.d['stats.x_window'] = x_window
+
                 var_order = args[-1]
                 if not var_order:
                     var_order = list(Matrix.settings.keys())
@@ -460,8 +575,19 @@ def build_callbacks(app):
 
                 setting_lists = [[(key, v) for v in variables[key]] for key in ordered_vars]
 
+                # the same figure is requested on every interaction with the page.
+                # Not with 'help', which needs the cfg keys requested by do_plot.
+                use_figure_cache = figure_cache.cache is not None and "help" not in cfg.d
+
+                cache_key = figure_cache.get_key(table_stat.name, settings, ordered_vars, cfg.d)
+                cached_plot_msg = figure_cache.cache.get(cache_key) if use_figure_cache else None
+
                 try:
-                    plot_msg = table_stat.do_plot(ordered_vars, settings, setting_lists, variables, cfg)
+                    if cached_plot_msg is not None:
+                        plot_msg = cached_plot_msg
+                    else:
+                        with metrics.span("do_plot", table_stat.name):
+                            plot_msg = table_stat.do_plot(ordered_vars, settings, setting_lists, variables, cfg)
                 except Exception as e:
                     import bdb
                     if isinstance(e, bdb.BdbQuit): raise e
@@ -477,6 +603,13 @@ def build_callbacks(app):
                     logging.error(msg)
                     return None, msg
 
+                if cached_plot_msg is None:
+                    with metrics.span("encode", table_stat.name):
+                        figure_encoding.encode_figure(plot_msg[0])
+
+                if use_figure_cache and cached_plot_msg is None:
+                    figure_cache.cache.set(cache_key, plot_msg)
+
                 plot, msg = plot_msg
 
                 if "help" not in cfg.d:
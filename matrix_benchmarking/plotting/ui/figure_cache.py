@@ -0,0 +1,205 @@
+import os
+import logging
+import pathlib
+import pickle
+import hashlib
+import collections
+
+import numpy as np
+import plotly.graph_objs as go
+from plotly.basedatatypes import BasePlotlyType
+
+#
+# Cache of the figures generated by the visualizer callbacks.
+#
+# The same figure is requested again on every interaction with the
+# page (dropdown changes, permalink updates, ...). The figures are
+# cached with a LRU policy, bounded by their (estimated) size.
+#
+# When the visualizer is served by multiple worker processes, the
+# figures are also stored on disk, so that the workers share them.
+#
+
+# 0: disable the cache
+FIGURE_CACHE_SIZE_MB = int(os.environ.get("MATBENCH_PLOTTING_FIGURE_CACHE_MB", 256))
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+
+    return value
+
+
+def get_key(stat_name, settings, ordered_vars, cfg):
+    return (stat_name, _freeze(settings), tuple(ordered_vars), _freeze(cfg))
+
+
+# the size of the long lists is estimated from this number of elements
+SIZE_SAMPLE = 16
+
+
+def _get_size(value):
+    """
+    Returns an estimate of the size of a cached value, without
+    serializing it (the figure is serialized again for the response).
+    """
+
+    if isinstance(value, go.Figure):
+        # the properties set in the figure, without copying them (to_plotly_json deep-copies)
+        value = dict(data=[trace._props for trace in value.data], layout=value.layout._props)
+    elif isinstance(value, BasePlotlyType):
+        value = value._props
+    elif hasattr(value, "to_plotly_json"):
+        value = value.to_plotly_json() # Dash components
+
+    if value is None:
+        return 0
+
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    if isinstance(value, (str, bytes)):
+        return len(value)
+
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _get_size(v) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        if len(value) <= SIZE_SAMPLE:
+            return sum(_get_size(v) for v in value)
+
+        sample = value[::len(value) // SIZE_SAMPLE][:SIZE_SAMPLE]
+        return sum(_get_size(v) for v in sample) * len(value) // len(sample)
+
+    return 8 # numbers, booleans, ...
+
+
+class FigureCache():
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = collections.OrderedDict() # key --> (plot_msg, size)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        self.entries.move_to_end(key)
+
+        plot_msg, _ = entry
+        return plot_msg
+
+    def set(self, key, plot_msg):
+        size = _get_size(plot_msg)
+
+        if size > self.max_size:
+            logging.info(f"Figure too large for the figure cache ({size/1024/1024:.1f}MB).")
+            return
+
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+
+        self.entries[key] = (plot_msg, size)
+        self.size += size
+
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+
+
+class SharedFigureCache(FigureCache):
+    """
+    Figure cache shared between processes, stored as pickle files in
+    'dirname'. The in-memory cache is kept in front of it.
+    """
+
+    def __init__(self, max_size, dirname):
+        super().__init__(max_size)
+
+        self.dirname = pathlib.Path(dirname)
+        self.dirname.mkdir(parents=True, exist_ok=True)
+
+    def _get_path(self, key):
+        return self.dirname / f"{hashlib.sha256(repr(key).encode()).hexdigest()}.pickle"
+
+    def get(self, key):
+        plot_msg = super().get(key)
+        if plot_msg is not None:
+            return plot_msg
+
+        path = self._get_path(key)
+        try:
+            with open(path, "rb") as f:
+                plot_msg = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Couldn't load the cached figure {path.name}: {e}")
+            return None
+
+        try:
+            os.utime(path) # LRU
+        except FileNotFoundError:
+            pass # evicted by another worker
+        super().set(key, plot_msg)
+
+        return plot_msg
+
+    def set(self, key, plot_msg):
+        super().set(key, plot_msg)
+
+        path = self._get_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(plot_msg, f)
+            os.replace(tmp_path, path) # atomic, the other workers never see a partial file
+        except Exception as e:
+            logging.warning(f"Couldn't store the figure in the shared cache: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for path in self.dirname.glob("*.pickle"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue # evicted by another worker
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(file_size for _, file_size, _ in files)
+        for _, file_size, path in sorted(files):
+            if size <= self.max_size:
+                break
+
+            path.unlink(missing_ok=True)
+            size -= file_size
+
+
+def _create_cache(dirname=None):
+    if FIGURE_CACHE_SIZE_MB <= 0:
+        return None
+
+    max_size = FIGURE_CACHE_SIZE_MB * 1024 * 1024
+
+    return SharedFigureCache(max_size, dirname) if dirname else FigureCache(max_size)
+
+
+def configure_shared(dirname):
+    """
+    Shares the figure cache with the other processes using 'dirname'.
+    """
+
+    global cache
+    cache = _create_cache(dirname)
+
+
+cache = _create_cache()
@@ -0,0 +1,102 @@
+import os
+import numbers
+
+import numpy as np
+import plotly.graph_objs as go
+
+#
+# Compact encoding of the figures sent to the browser.
+#
+# The plots store their values in plain lists, which are serialized as
+# JSON lists of floats. When converted to numpy arrays, plotly sends
+# them as base64 typed arrays ({"dtype": "f8", "bdata": "..."}), which
+# are smaller and faster to load in plotly.js.
+#
+# The category labels cannot be typed arrays. They are deduplicated
+# by the response compression (see web.COMPRESS_RESPONSES). The
+# numeric values of the category axes are left as they are, as their
+# float conversion would change the labels (1 --> 1.0).
+#
+
+BINARY_ARRAYS = os.environ.get("MATBENCH_PLOTTING_BINARY_ARRAYS", "1") in ("1", "y", "yes", "true", "True")
+
+# the trace properties that may hold numeric arrays
+ARRAY_PROPERTIES = ("x", "y", "z")
+ERROR_PROPERTIES = ("error_x", "error_y")
+ERROR_ARRAY_PROPERTIES = ("array", "arrayminus")
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def to_typed_array(values):
+    """
+    Returns the values as a float numpy array, with the None values
+    as NaN (shown as gaps by plotly.js), or None if the values aren't
+    all numeric.
+    """
+
+    if isinstance(values, np.ndarray) or not isinstance(values, (list, tuple)):
+        return None
+
+    if len(values) < 2:
+        return None # not worth it
+
+    has_number = False
+    for value in values:
+        if value is None: continue
+        if not _is_number(value): return None
+        has_number = True
+
+    if not has_number:
+        return None
+
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+def _set_array(obj, prop, typed_array):
+    # plotly ignores the assignment of a value equal to the current
+    # one, eg (1.5, 2) --> array([1.5, 2.]), clear it first
+    obj[prop] = None
+    obj[prop] = typed_array
+
+
+def _is_category_axis(figure, trace, prop):
+    # x --> trace.xaxis = "x2" --> layout.xaxis2
+    if prop not in ("x", "y") or f"{prop}axis" not in trace:
+        return False
+
+    axis = trace[f"{prop}axis"] or prop
+    layout_axis = f"{prop}axis{axis[1:]}"
+
+    return layout_axis in figure.layout and figure.layout[layout_axis].type == "category"
+
+
+def encode_figure(figure):
+    """
+    Converts the numeric arrays of the figure traces to typed arrays, in place.
+    Only applies to the plotly Figure objects.
+    """
+
+    if not BINARY_ARRAYS or not isinstance(figure, go.Figure):
+        return figure
+
+    for trace in figure.data:
+        for prop in ARRAY_PROPERTIES:
+            if prop not in trace: continue
+            if _is_category_axis(figure, trace, prop): continue
+
+            typed_array = to_typed_array(trace[prop])
+            if typed_array is not None:
+                _set_array(trace, prop, typed_array)
+
+        for error_prop in ERROR_PROPERTIES:
+            if error_prop not in trace: continue
+
+            for prop in ERROR_ARRAY_PROPERTIES:
+                typed_array = to_typed_array(trace[error_prop][prop])
+                if typed_array is not None:
+                    _set_array(trace[error_prop], prop, typed_array)
+
+    return figure
@@ -0,0 +1,147 @@
+import os
+import logging
+import pathlib
+import concurrent.futures
+
+#
+# Background rendering of the figure images and HTML files.
+#
+# Rendering a figure image goes through kaleido, which is slow. With
+# MATBENCH_PLOTTING_RENDER_WORKERS > 0, the figures are queued to a
+# pool of persistent worker processes, and rendered in parallel while
+# the reports are assembled. kaleido (0.2.1, see requirements.txt)
+# keeps its rendering subprocess alive between the images of a
+# worker. Call wait() before exiting to make sure that all the files
+# have been written.
+#
+# With MATBENCH_PLOTTING_SHARED_PLOTLYJS=1, the figure HTML files
+# reference a plotly.js bundle written once per directory, instead of
+# embedding a copy of it (several MB per file).
+#
+
+# 0: render the images synchronously
+RENDER_WORKERS = int(os.environ.get("MATBENCH_PLOTTING_RENDER_WORKERS", 0))
+
+SHARED_PLOTLYJS = os.environ.get("MATBENCH_PLOTTING_SHARED_PLOTLYJS", "0") in ("1", "y", "yes", "true", "True")
+
+PLOTLYJS_BUNDLE_NAME = "plotly.min.js"
+
+_renderer = None
+
+
+def _write_image(figure, dest, width, height):
+    figure.write_image(dest, width=width, height=height)
+
+    return dest
+
+
+def _write_html(figure, dest, include_plotlyjs):
+    figure.write_html(dest, include_plotlyjs=include_plotlyjs)
+
+    return dest
+
+
+def _get_include_plotlyjs(dest):
+    if not SHARED_PLOTLYJS:
+        return True
+
+    # write the bundle here, so that the workers don't race to create it
+    bundle = pathlib.Path(dest).parent / PLOTLYJS_BUNDLE_NAME
+    if not bundle.exists():
+        import plotly.offline
+        logging.info(f"Saving {bundle} ...")
+        bundle.write_text(plotly.offline.get_plotlyjs(), encoding="utf-8")
+
+    return "directory"
+
+
+class FigureRenderer():
+    def __init__(self, workers):
+        logging.info(f"Starting {workers} figure rendering workers ...")
+        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        self.pending = []
+
+    def write_image(self, figure, dest, width, height):
+        future = self.executor.submit(_write_image, figure, dest, width, height)
+        self.pending.append((dest, future))
+
+    def write_html(self, figure, dest, include_plotlyjs):
+        future = self.executor.submit(_write_html, figure, dest, include_plotlyjs)
+        self.pending.append((dest, future))
+
+    def wait(self):
+        failures = 0
+        for dest, future in self.pending:
+            try:
+                future.result()
+            except Exception as e:
+                logging.error(f"Failed to render {dest}: {e}")
+                failures += 1
+
+        if self.pending:
+            logging.info(f"Rendered {len(self.pending) - failures}/{len(self.pending)} figure files.")
+
+        self.pending = []
+
+        return failures
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+
+def get_renderer():
+    global _renderer
+
+    if RENDER_WORKERS <= 0:
+        return None
+
+    if _renderer is None:
+        _renderer = FigureRenderer(RENDER_WORKERS)
+
+    return _renderer
+
+
+def write_image(figure, dest, width, height):
+    """
+    Writes the image of the figure, in the background if the rendering workers are enabled.
+    """
+
+    renderer = get_renderer()
+    if renderer is None:
+        figure.write_image(dest, width=width, height=height)
+        return
+
+    renderer.write_image(figure, dest, width, height)
+
+
+def write_html(figure, dest):
+    """
+    Writes the HTML file of the figure, in the background if the rendering workers are enabled.
+    """
+
+    include_plotlyjs = _get_include_plotlyjs(dest)
+
+    renderer = get_renderer()
+    if renderer is None:
+        figure.write_html(dest, include_plotlyjs=include_plotlyjs)
+        return
+
+    renderer.write_html(figure, dest, include_plotlyjs)
+
+
+def wait():
+    """
+    Waits for the files being rendered in the background, and stops the workers.
+    Returns the number of failures.
+    """
+
+    global _renderer
+
+    if _renderer is None:
+        return 0
+
+    failures = _renderer.wait()
+    _renderer.shutdown()
+    _renderer = None
+
+    return failures
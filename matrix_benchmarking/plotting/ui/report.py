@@ -1,16 +1,24 @@
 import pathlib
 import logging
+import shutil
 
 from dash import html
 from dash import dcc
+import plotly.graph_objects as go
+
+from . import render
 
 class _Report():
-    def __init__(self, id_name, index):
+    def __init__(self, id_name, index, share_plotlyjs=False):
         self.id_name = id_name
         self.index = index
 
         self.figure_index = 0
 
+        # if True, only the first figure embedded in the report includes the plotly.js bundle
+        self.share_plotlyjs = share_plotlyjs
+        self.plotlyjs_included = False
+
     def _children_element_to_html(self, elt):
         props = " ".join([f"{k}='{getattr(elt, k)}'" for k in elt.available_properties if k not in ("children", "style") and hasattr(elt, k)])
 
@@ -63,8 +71,8 @@ class _Report():
 
         from .web import IMAGE_WIDTH, IMAGE_HEIGHT
         try:
-            figure.write_html(dest_html)
-            figure.write_image(dest_png, width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+            render.write_html(figure, dest_html)
+            render.write_image(figure, dest_png, IMAGE_WIDTH, IMAGE_HEIGHT)
         except Exception as e:
             msg = f"Failed to save graph #{self.index} {self.id_name} '{figure.layout.title.text}':"
             logging.exception(f"Failed to save graph #{self.index} {self.id_name}: {e}")
@@ -77,6 +85,12 @@ class _Report():
             f"<p><a href='{dest}.html' target='_blank' title='Click to access the full-size interactive version.'><img src='{dest}.png'/></a></p>"
          ]
 
+    def _figure_to_html(self, figure):
+        include_plotlyjs = not self.plotlyjs_included
+        self.plotlyjs_included = True
+
+        return [figure.to_html(full_html=False, include_plotlyjs=include_plotlyjs)]
+
     def _element_to_html(self, elt):
         if elt is None:
             return ["None"]
@@ -88,6 +102,8 @@ class _Report():
             return self._children_element_to_html(elt)
         elif isinstance(elt, dcc.Graph):
             return self._graph_element_to_html(elt)
+        elif self.share_plotlyjs and isinstance(elt, go.Figure):
+            return self._figure_to_html(elt)
         elif to_html := getattr(elt, "to_html", None):
             return [to_html()]
         else:
@@ -122,5 +138,133 @@ class _Report():
             print(f"<li><a href='{dest}'> Report {self.index:02d}: {self.id_name.replace('_', ' ')}</a>",
                   file=report_index_f)
 
+class StreamingReport(_Report):
+    """
+    Renders the report elements to disk as soon as they are generated,
+    instead of keeping the whole report in memory until the end.
+
+    The elements are written into a temporary body file. The header
+    elements, only known at the end (eg, the summary), are written
+    before the body when the report is closed.
+    """
+
+    def __init__(self, dest, share_plotlyjs=False):
+        super().__init__(str(dest), None, share_plotlyjs)
+
+        self.dest = pathlib.Path(dest)
+        self.body_dest = self.dest.with_name(f".{self.dest.name}.body")
+        self.body_f = open(self.body_dest, "w")
+
+    def write(self, elt):
+        print("\n".join(self._element_to_html(elt)), file=self.body_f)
+
+    def write_entry(self, idx, name, status, entry):
+        for elt in entry:
+            self.write(elt)
+
+    def close(self, header):
+        self.body_f.close()
+
+        html = ["<span>"]
+        for elt in header:
+            html += self._element_to_html(elt)
+
+        logging.info(f"Saving {self.dest} ...")
+        with open(self.dest, "w") as out_f, open(self.body_dest) as body_f:
+            print("\n".join(html), file=out_f)
+            shutil.copyfileobj(body_f, out_f)
+            print("</span>", file=out_f)
+
+        self.body_dest.unlink()
+
+    def discard(self):
+        self.body_f.close()
+        self.body_dest.unlink(missing_ok=True)
+
+
+class ShardedReport(_Report):
+    """
+    Renders the report entries into pages of 'entries_per_page' entries,
+    stored in the '<dest stem>_pages' directory.
+
+    The header elements (eg, the summary) are written into the 'dest'
+    index page, along with the status of each entry and the link to
+    its page.
+    """
+
+    def __init__(self, dest, entries_per_page, share_plotlyjs=False):
+        super().__init__(str(dest), None, share_plotlyjs)
+
+        self.dest = pathlib.Path(dest)
+        self.entries_per_page = entries_per_page
+
+        self.pages_dirname = self.dest.with_name(f"{self.dest.stem}_pages")
+        if self.pages_dirname.exists():
+            # remove the pages of the previous report
+            shutil.rmtree(self.pages_dirname)
+        self.pages_dirname.mkdir(parents=True)
+
+        self.pages = [] # [(page dest, [(entry idx, entry name, entry status), ...]), ...]
+        self.page_f = None
+
+    def _close_page(self):
+        if self.page_f is None:
+            return
+
+        print("</span>", file=self.page_f)
+        self.page_f.close()
+        self.page_f = None
+
+    def _open_page(self):
+        self._close_page()
+
+        page_dest = self.pages_dirname / f"page_{len(self.pages) + 1:03d}.html"
+        self.pages.append((page_dest, []))
+
+        logging.info(f"Saving {page_dest} ...")
+        self.page_f = open(page_dest, "w")
+        self.plotlyjs_included = False # each page needs its own copy
+        print("<span>", file=self.page_f)
+        print(f"<p><a href='../{self.dest.name}'>Back to the report index.</a></p>", file=self.page_f)
+
+    def write_entry(self, idx, name, status, entry):
+        if self.page_f is None or len(self.pages[-1][1]) >= self.entries_per_page:
+            self._open_page()
+
+        self.pages[-1][1].append((idx, name, status))
+
+        for elt in entry:
+            print("\n".join(self._element_to_html(elt)), file=self.page_f)
+
+    def _generate_pages_index(self):
+        index = [html.H2("Report pages")]
+
+        for page_dest, entries in self.pages:
+            page_link = f"{self.pages_dirname.name}/{page_dest.name}"
+            first_idx, last_idx = entries[0][0], entries[-1][0]
+            title = f"Entry #{first_idx}" if first_idx == last_idx else f"Entries #{first_idx} to #{last_idx}"
+
+            index.append(html.H3(html.A(title, href=page_link)))
+            index.append(html.Ul([html.Li(f"Entry #{idx} – {name}: {status}") for idx, name, status in entries]))
+
+        return index
+
+    def close(self, header):
+        self._close_page()
+
+        html_content = ["<span>"]
+        for elt in list(header) + self._generate_pages_index():
+            html_content += self._element_to_html(elt)
+        html_content += ["</span>"]
+
+        logging.info(f"Saving {self.dest} ...")
+        with open(self.dest, "w") as out_f:
+            print("\n".join(html_content), file=out_f)
+
+    def discard(self):
+        self._close_page()
+        shutil.rmtree(self.pages_dirname, ignore_errors=True)
+
+
 def generate(idx, id_name, content, report_index_f, include_header=True):
     _Report(id_name, idx).generate(content, report_index_f, include_header)
@@ -0,0 +1,191 @@
+import os
+import html
+import logging
+import multiprocessing
+import urllib.parse
+
+from dash import dcc
+
+import matrix_benchmarking.plotting.ui as ui
+import matrix_benchmarking.plotting.table_stats as table_stats
+import matrix_benchmarking.plotting.ui.report as report
+import matrix_benchmarking.plotting.ui.render as render
+
+#
+# Batch generation of the figures of many queries, as a static site.
+#
+# The queries are split into one query per stat, so that the figures
+# shared by multiple queries are only generated once. The figures are
+# generated in parallel by worker processes forked after the parsing
+# of the results, so that they share the matrix.
+#
+# The site files are written in the current directory:
+# - index.html: the list of the queries,
+# - query_NNN.html: the figures of a query,
+# - fig_NN_<stat>.{html,png}, report_NN_<stat>.html: the figures and reports
+#   (same index width as the report files of report.py).
+#
+
+INDEX_NAME = "index.html"
+
+
+def parse_queries_file(filename):
+    """
+    Returns the queries of the file, one per line. The empty lines and
+    the lines starting with '#' are ignored.
+    """
+
+    with open(filename) as f:
+        return [line.strip() for line in f
+                if line.strip() and not line.strip().startswith("#")]
+
+
+def split_query(query):
+    """
+    Returns the query of each stat of the query, in a canonical form.
+    Returns an empty list if the query has no 'stats' parameter.
+    """
+
+    params = urllib.parse.parse_qs(query.split("?", maxsplit=1)[-1])
+    stats = params.pop("stats", [])
+
+    return [(stat_name, urllib.parse.urlencode(sorted({**params, "stats": [stat_name]}.items()), doseq=True))
+            for stat_name in stats]
+
+
+def _init_worker():
+    # the workers are daemon processes, they cannot start the rendering pool
+    render.RENDER_WORKERS = 0
+
+
+def _generate_figure(unit_idx, query):
+    try:
+        page = ui.build_layout(query, serializing=True)
+    except Exception as e:
+        logging.exception(f"Failed to generate the figure of '{query}'")
+        return unit_idx, None, f"{e.__class__.__name__}: {e}"
+
+    content = page.children[1].children
+    for graph, text in zip(content[0::2], content[1::2]):
+        if not isinstance(graph, dcc.Graph):
+            continue
+
+        stats = table_stats.TableStats.stats_by_id[graph.id]
+
+        try:
+            if getattr(stats, "is_report", False):
+                report.generate(unit_idx, graph.id, text, None, include_header=False)
+                return unit_idx, (f"report_{unit_idx:02d}_{graph.id}.html", None), None
+
+            figure = graph.figure
+            if not figure:
+                return unit_idx, None, "no figure generated"
+
+            dest = f"fig_{unit_idx:02d}_{graph.id.replace(' ', '_').replace('/', '_')}"
+
+            from .web import IMAGE_WIDTH, IMAGE_HEIGHT
+
+            logging.info(f"Saving {dest} ...")
+            render.write_html(figure, f"{dest}.html")
+            render.write_image(figure, f"{dest}.png", IMAGE_WIDTH, IMAGE_HEIGHT)
+        except Exception as e:
+            logging.exception(f"Failed to save the figure of '{query}'")
+            return unit_idx, None, f"{e.__class__.__name__}: {e}"
+
+        return unit_idx, (f"{dest}.html", f"{dest}.png"), None
+
+    return unit_idx, None, "stat not found"
+
+
+def _write_query_page(query_idx, query, stat_units, results):
+    dest = f"query_{query_idx:03d}.html"
+
+    with open(dest, "w") as out_f:
+        print(f"<h1>{html.escape(query)}</h1>", file=out_f)
+        print(f"<p><a href='{INDEX_NAME}'>Back to the index.</a></p><hr>", file=out_f)
+
+        if not stat_units:
+            print("<p><i>No stats in the query.</i></p>", file=out_f)
+
+        for stat_name, unit_idx in stat_units:
+            files, error = results[unit_idx]
+
+            print(f"<h2>{html.escape(stat_name)}</h2>", file=out_f)
+            if error:
+                print(f"<p><i>Generation failed: {html.escape(error)}</i></p>", file=out_f)
+                continue
+
+            page, image = files
+            if image is None:
+                print(f"<p><a href='{page}'>Open the report.</a></p>", file=out_f)
+            else:
+                print(f"<p><a href='{page}' target='_blank' title='Click to access the full-size interactive version.'>"
+                      f"<img src='{image}'/></a></p>", file=out_f)
+
+    return dest
+
+
+def generate(queries, workers=0):
+    """
+    Generates the figures of the queries as a static site, with 'workers'
+    processes (0: one per CPU). Returns the number of failed figures and
+    queries without stats.
+    """
+
+    units = {} # canonical stat query --> unit index
+    query_units = []
+    invalid_queries = 0
+    for query in queries:
+        stat_units = []
+        for stat_name, unit_query in split_query(query):
+            stat_units.append((stat_name, units.setdefault(unit_query, len(units))))
+        query_units.append(stat_units)
+
+        if not stat_units:
+            logging.error(f"No 'stats' parameter in the query '{query}'.")
+            invalid_queries += 1
+
+    nb_figures = sum(len(stat_units) for stat_units in query_units)
+    logging.info(f"Generating {len(units)} figures for {len(queries)} queries "
+                 f"({nb_figures - len(units)} shared between the queries) ...")
+
+    workers = workers or os.cpu_count()
+
+    # fork: the workers share the matrix and the plotting callbacks
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers, initializer=_init_worker) as pool:
+        results = {unit_idx: (files, error) for unit_idx, files, error
+                   in pool.starmap(_generate_figure, [(unit_idx, unit_query) for unit_query, unit_idx in units.items()])}
+
+    failures = 0
+    for unit_query, unit_idx in units.items():
+        _, error = results[unit_idx]
+        if not error: continue
+        logging.error(f"Failed to generate '{unit_query}': {error}")
+        failures += 1
+
+    with open(INDEX_NAME, "w") as index_f:
+        print("<h1>MatrixBenchmarking figures</h1>", file=index_f)
+        print("<ul>", file=index_f)
+        for query_idx, (query, stat_units) in enumerate(zip(queries, query_units)):
+            dest = _write_query_page(query_idx, query, stat_units, results)
+            print(f"<li><a href='{dest}'>{html.escape(query)}</a></li>", file=index_f)
+        print("</ul>", file=index_f)
+
+    logging.info(f"Generated {len(units) - failures}/{len(units)} figures. See {INDEX_NAME}.")
+
+    return failures + invalid_queries
+
+
+def generate_from_file(filename, workers=0):
+    try:
+        queries = parse_queries_file(filename)
+    except OSError as e:
+        logging.error(f"Couldn't read the queries file: {e}")
+        return 1
+
+    if not queries:
+        logging.error(f"No query found in '{filename}'.")
+        return 1
+
+    return 1 if generate(queries, workers) else 0
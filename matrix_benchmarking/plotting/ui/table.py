@@ -0,0 +1,163 @@
+import itertools
+
+#
+# Lightweight replacement of the pandas Styler for the static reports.
+#
+# The Styler renders its tables through Jinja templates, which takes
+# milliseconds per table. This table renders the same colors and
+# formatting from plain rows, with the cell styles inlined.
+#
+# The Styler conventions are kept: the format strings/functions are
+# applied per column, the row styling functions receive a row and
+# return one CSS string per cell, and the table styles are scoped to
+# the table id.
+#
+
+# the Styler default precision for the floats
+DEFAULT_PRECISION = 6
+
+_table_ids = itertools.count()
+
+
+def _default_formatter(value):
+    if isinstance(value, bool):
+        return str(value)
+
+    if isinstance(value, float):
+        return f"{value:.{DEFAULT_PRECISION}f}"
+
+    return str(value)
+
+
+def _get_formatter(formatter):
+    if isinstance(formatter, str):
+        return formatter.format
+
+    return lambda value: str(formatter(value))
+
+
+class TableRow():
+    """
+    The row received by the styling functions.
+    Supports the subset of the pandas Series API used by the reports:
+    row.keys(), row.values, row[key] and row.key.
+    """
+
+    def __init__(self, column_index, values):
+        self._column_index = column_index
+        self.values = values
+
+    def keys(self):
+        return list(self._column_index)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        return self.values[self._column_index[key]]
+
+    def __getattr__(self, key):
+        try:
+            return self.values[self._column_index[key]]
+        except KeyError:
+            raise AttributeError(key)
+
+
+class Table():
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.rows = rows
+
+        self.formatters = {}
+        self.row_stylers = []
+        self.hidden_columns = set()
+        self.table_styles = []
+
+    @classmethod
+    def from_records(cls, records):
+        # same column order as pd.DataFrame(records): the order of first appearance
+        columns = {}
+        for record in records:
+            for key in record:
+                columns.setdefault(key, None)
+
+        rows = [[record.get(key, float("nan")) for key in columns] for record in records]
+
+        return cls(columns, rows)
+
+    @classmethod
+    def from_items(cls, items):
+        # same as pd.DataFrame(dict.items()): two unnamed columns
+        return cls([0, 1], [list(item) for item in items])
+
+    @classmethod
+    def from_df(cls, df):
+        return cls(df.columns, [list(row) for row in df.itertuples(index=False, name=None)])
+
+    def format(self, formatters):
+        for column, formatter in formatters.items():
+            self.formatters[column] = _get_formatter(formatter)
+
+        return self
+
+    def apply(self, row_styler):
+        self.row_stylers.append(row_styler)
+
+        return self
+
+    def hide_columns(self, columns):
+        self.hidden_columns.update(columns)
+
+        return self
+
+    def set_table_styles(self, table_styles):
+        self.table_styles = table_styles
+
+        return self
+
+    def _get_row_styles(self, column_index, values):
+        styles = [""] * len(values)
+
+        for row_styler in self.row_stylers:
+            for idx, style in enumerate(row_styler(TableRow(column_index, values))):
+                if not style: continue
+                styles[idx] = f"{styles[idx]}; {style}" if styles[idx] else style
+
+        return styles
+
+    def to_html(self):
+        table_id = f"T_{next(_table_ids)}"
+
+        column_index = {column: idx for idx, column in enumerate(self.columns)}
+        visible = [idx for idx, column in enumerate(self.columns) if column not in self.hidden_columns]
+        formatters = [self.formatters.get(self.columns[idx], _default_formatter) for idx in visible]
+
+        html = ['<style type="text/css">']
+        for table_style in self.table_styles:
+            html.append(f"#{table_id} {table_style['selector']} {{")
+            html += [f"  {prop}: {value};" for prop, value in table_style["props"]]
+            html.append("}")
+        html.append("</style>")
+
+        html.append(f'<table id="{table_id}">')
+
+        html.append("  <thead>")
+        html.append("    <tr>")
+        html += [f'      <th class="col_heading">{self.columns[idx]}</th>' for idx in visible]
+        html.append("    </tr>")
+        html.append("  </thead>")
+
+        html.append("  <tbody>")
+        for values in self.rows:
+            styles = self._get_row_styles(column_index, values) if self.row_stylers else None
+
+            html.append("    <tr>")
+            for idx, formatter in zip(visible, formatters):
+                style = f' style="{styles[idx]}"' if styles and styles[idx] else ""
+                html.append(f"      <td{style}>{formatter(values[idx])}</td>")
+            html.append("    </tr>")
+        html.append("  </tbody>")
+
+        html.append("</table>")
+
+        return "\n".join(html)
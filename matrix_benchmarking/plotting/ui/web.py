@@ -1,5 +1,7 @@
 import traceback, sys, os
 import logging
+import tempfile
+import shutil
 
 import dash
 from dash import html
@@ -16,12 +18,36 @@ import matrix_benchmarking.store as store
 import matrix_benchmarking.cli_args as cli_args
 import matrix_benchmarking.plotting.table_stats as table_stats
 import matrix_benchmarking.plotting.ui.report as report
+import matrix_benchmarking.plotting.ui.render as render
+import matrix_benchmarking.plotting.ui.figure_cache as figure_cache
+import matrix_benchmarking.plotting.ui.site as site
 
 IMAGE_WIDTH = int(os.environ.get("MATBENCH_PLOTTING_IMAGE_WIDTH", 1200))
 IMAGE_HEIGHT = int(os.environ.get("MATBENCH_PLOTTING_IMAGE_HEIGHT", 650))
 
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8050
+# slow plots must not get the workers killed
+SERVER_WORKER_TIMEOUT = 600
+
+# gzip/brotli compression of the responses, if flask-compress is available
+COMPRESS_RESPONSES = os.environ.get("MATBENCH_VISUALIZE_COMPRESS", "1") in ("1", "y", "yes", "true", "True")
+
+def _get_compress():
+    if not COMPRESS_RESPONSES:
+        return False
+
+    try:
+        import flask_compress
+    except ImportError:
+        logging.warning("flask-compress not available, the responses won't be compressed. "
+                        "Install dash[compress] to enable it.")
+        return False
+
+    return True
+
 # stylesheets now served via assets/bWLwgP.css and automatically included
-main_app = dash.Dash(__name__)
+main_app = dash.Dash(__name__, compress=_get_compress())
 
 log = logging.getLogger('werkzeug')
 log.setLevel(logging.ERROR)
@@ -65,6 +91,10 @@ def run():
     display_page = construct_dispatcher()
 
     generate = cli_args.kwargs["generate"]
+    generate_batch = cli_args.kwargs.get("generate_batch")
+
+    if generate_batch:
+        sys.exit(site.generate_from_file(generate_batch, int(cli_args.kwargs.get("generate_workers") or 0)))
 
     if generate:
         logging.info(f"Generating http://127.0.0.1:8050/matrix?{generate.replace(' ', '%20')} ...")
@@ -94,14 +124,22 @@ def run():
             dest = f"{idx:02d}_{graph.id.replace(' ', '_').replace('/', '_')}"
 
             logging.info(f"Saving {dest} ...")
-            figure.write_html(f"fig_{dest}.html")
-            figure.write_image(f"fig_{dest}.png", width=IMAGE_WIDTH, height=IMAGE_HEIGHT)
+            render.write_html(figure, f"fig_{dest}.html")
+            render.write_image(figure, f"fig_{dest}.png", IMAGE_WIDTH, IMAGE_HEIGHT)
 
         print("</ul>", file=report_index_f)
         report_index_f.close()
 
+        if render.wait():
+            logging.error("Some of the figure files couldn't be rendered.")
+            sys.exit(1)
+
         sys.exit(0)
 
+    serve_workers = int(cli_args.kwargs.get("serve_workers") or 0)
+    if serve_workers > 0:
+        return run_workers(serve_workers)
+
     try: main_app.run_server()
     except OSError as e:
         if e.errno == 98:
@@ -112,3 +150,40 @@ def run():
     except Exception as e:
         logging.error(f"DASH: {e.__class__.__name__}: {e}")
         traceback.print_exception(*sys.exc_info())
+
+
+def run_workers(workers):
+    try:
+        import gunicorn.app.base
+    except ImportError:
+        logging.error("The 'gunicorn' package is required to serve the visualizer with multiple workers.")
+        return 1
+
+    class VisualizerApplication(gunicorn.app.base.BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return main_app.server
+
+    # the matrix is already loaded, the forked workers share it copy-on-write.
+    # The figures are shared between the workers through the disk.
+    figure_cache_dir = tempfile.mkdtemp(prefix="matbench_figures_")
+    figure_cache.configure_shared(figure_cache_dir)
+
+    logging.info(f"Serving the visualizer on http://{SERVER_HOST}:{SERVER_PORT} with {workers} workers ...")
+    try:
+        VisualizerApplication(dict(
+            bind=f"{SERVER_HOST}:{SERVER_PORT}",
+            workers=workers,
+            timeout=SERVER_WORKER_TIMEOUT,
+        )).run()
+    finally:
+        shutil.rmtree(figure_cache_dir, ignore_errors=True)
+
+    return 0
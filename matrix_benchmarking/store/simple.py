@@ -12,7 +12,6 @@ import matrix_benchmarking.matrix as matrix
 import matrix_benchmarking.common as common
 import matrix_benchmarking.store as store
 import matrix_benchmarking.cli_args as cli_args
-from matrix_benchmarking import download_lts
 
 def invalid_directory(dirname, settings, reason, warn=False):
     run_flag = cli_args.kwargs.get("run")
@@ -177,6 +176,9 @@ class RecursiveNamespace(types.SimpleNamespace):
 
 
 def parse_lts_data(lts_results_dir=None):
+    # lazy loading, download_lts imports the OpenSearch client
+    from matrix_benchmarking import download_lts
+
     if lts_results_dir is None:
         lts_results_dir = pathlib.Path(cli_args.kwargs["lts_results_dirname"])
 
@@ -2,8 +2,9 @@ import logging
 import getpass
 import datetime as dt
 import requests
-import json
-import functools
+from collections import defaultdict
+
+from opensearchpy import helpers as opensearch_helpers
 
 import matrix_benchmarking.common as common
 import matrix_benchmarking.cli_args as cli_args
@@ -25,6 +26,8 @@ def main(
         filters: list[str] = [],
         dry_run: bool = False,
         upload_by_kpi: bool = False,
+        bulk_chunk_size: int = 500,
+        bulk_concurrency: int = 1,
     ):
     """
 Upload MatrixBenchmark LTS payloads to OpenSearch
@@ -46,11 +49,13 @@ Args:
     filters: If provided, parse and upload only the experiment matching the filters. Eg: expe=expe1:expe2,something=true. (Optional.)
     dry_run: If provided, only parse results and not upload results to horreum. (Optional.)
     upload_by_kpi: If enabled, upload the KPIs in a dedicated index (<opensearch_index>.<kpi_name>)
+    bulk_chunk_size: Number of documents sent in each bulk request. (Optional.)
+    bulk_concurrency: Number of bulk requests sent in parallel. (Optional.)
     """
 
     kwargs = dict(locals()) # capture the function arguments
 
-    optionals_flags = ["filters", "workload_base_dir", "dry_run", "upload_by_kpi"]
+    optionals_flags = ["filters", "workload_base_dir", "dry_run", "upload_by_kpi", "bulk_chunk_size", "bulk_concurrency"]
     safe_flags = ["results_dirname", "workload", "opensearch_index"] + optionals_flags
 
     cli_args.setup_env_and_kwargs(kwargs)
@@ -73,12 +78,14 @@ Args:
         common.Matrix.print_settings_to_log()
         common.Matrix.uniformize_settings_keys()
 
-        client = download_lts.connect_opensearch_client(kwargs) \
+        # one connection per parallel bulk request
+        client = download_lts.connect_opensearch_client(kwargs, pool_maxsize=int(kwargs.get("bulk_concurrency"))) \
             if not kwargs.get("dry_run") else None
 
         logging.info(f"Uploading to OpenSearch /{kwargs.get('opensearch_index')}...")
 
-        return upload(client, workload_store, kwargs.get("dry_run"), kwargs.get("opensearch_index"), kwargs.get("upload_by_kpi"))
+        return upload(client, workload_store, kwargs.get("dry_run"), kwargs.get("opensearch_index"), kwargs.get("upload_by_kpi"),
+                      int(kwargs.get("bulk_chunk_size")), int(kwargs.get("bulk_concurrency")))
 
     return cli_args.TaskRunner(run)
 
@@ -147,59 +154,138 @@ def get_kpi_index_name(opensearch_index, kpi_name):
     return f"{opensearch_index}.{kpi_name}"
 
 
-def create_indexes(client, workload_store, dry_run, opensearch_index, lts_payloads, upload_by_kpi):
+def get_schema_kpi_names():
+    schema = store.get_lts_schema()
+    if schema is None:
+        return None
+
+    kpis_field = schema.__fields__.get("kpis")
+    if kpis_field is None:
+        return None
+
+    kpis_fields = getattr(kpis_field.outer_type_, "__fields__", None)
+    if kpis_fields is None:
+        return None
+
+    return [field.alias for field in kpis_fields.values()]
+
+
+def create_indexes(client, dry_run, opensearch_index, upload_by_kpi):
     indexes_to_create = set()
     indexes_to_create.add(opensearch_index)
 
     if upload_by_kpi:
-        for lts_payload, _, _ in lts_payloads:
-            payload_json = json.dumps(lts_payload, default=functools.partial(parse.json_dumper, strict=False))
-            payload_dict = json.loads(payload_json)
+        kpi_names = get_schema_kpi_names()
+        if kpi_names is None:
+            logging.warning("Cannot get the list of KPIs from the LTS schema, the KPI indexes will be created during the upload.")
+            kpi_names = []
 
-            for kpi_name, kpi in payload_dict.get("kpis", {}).items():
-                kpi_index = get_kpi_index_name(opensearch_index, kpi_name)
-                indexes_to_create.add(kpi_index)
+        for kpi_name in kpi_names:
+            kpi_index = get_kpi_index_name(opensearch_index, kpi_name)
+            indexes_to_create.add(kpi_index)
 
     logging.info(f"Creating/updating {len(indexes_to_create)} indexes ...")
     for index_name in indexes_to_create:
         opensearch_create_index(client, dry_run, index_name)
 
+    return indexes_to_create
 
-def upload(client, workload_store, dry_run, opensearch_index, upload_by_kpi):
+
+def upload(client, workload_store, dry_run, opensearch_index, upload_by_kpi, bulk_chunk_size=500, bulk_concurrency=1):
     variables = [k for k, v in common.Matrix.settings.items() if len(v) > 1]
 
-    lts_payloads = list(workload_store.build_lts_payloads())
+    created_indexes = create_indexes(client, dry_run, opensearch_index, upload_by_kpi)
+
+    def prepare_actions():
+        # the payloads are generated and encoded one batch at a time.
+        # The indexes and the regression results of a batch are handled
+        # before the bulk upload of its documents starts.
+        actions = []
+        for idx, payload_dict in enumerate(parse.generate_lts_payload_dicts(workload_store)):
+            try:
+                settings_dict = payload_dict["metadata"]["settings"]
+                key = ",".join(f"{k}={v}" for k, v in settings_dict.items() if (not variables or k in variables))
+            except Exception as e:
+                logging.warning(f"Failed to compute the name of the entry: {e}")
+                key = str(payload_dict.get("metadata", {}).get("settings"))
+
+            logging.info(f"Preparing payload #{idx} | {key}")
+
+            if upload_by_kpi:
+                for kpi_name in payload_dict.get("kpis", {}):
+                    kpi_index = get_kpi_index_name(opensearch_index, kpi_name)
+                    if kpi_index in created_indexes: continue
+
+                    logging.warning(f"KPI '{kpi_name}' isn't part of the LTS schema, creating its index.")
+                    opensearch_create_index(client, dry_run, kpi_index)
+                    created_indexes.add(kpi_index)
+
+                actions += generate_kpis_actions(payload_dict, opensearch_index)
+            actions += generate_lts_actions(payload_dict, opensearch_index)
+            upload_regression_results_to_opensearch(client, payload_dict, dry_run, opensearch_index)
+
+            # enough documents for one chunk per parallel request
+            if len(actions) >= bulk_chunk_size * bulk_concurrency:
+                yield actions
+                actions = []
+
+        if actions:
+            yield actions
+
+    # index_name --> [successes, failures]
+    counts = defaultdict(lambda: [0, 0])
+    for actions in prepare_actions():
+        for index_name, (successes, index_failures) in bulk_upload(client, actions, dry_run, bulk_chunk_size, bulk_concurrency).items():
+            counts[index_name][0] += successes
+            counts[index_name][1] += index_failures
+
+    if counts and not dry_run:
+        # refresh once, instead of after each document
+        client.indices.refresh(index=",".join(counts.keys()))
+
+    failures = 0
+    for index_name, (successes, index_failures) in sorted(counts.items()):
+        logging.info(f"/{index_name}: {successes} document{'s' if successes != 1 else ''} uploaded, {index_failures} failed.")
+        failures += index_failures
+
+    if failures:
+        logging.error(f"{failures} document{'s' if failures != 1 else ''} failed to upload :/")
+        return 1
+
+    logging.info("All done :)")
 
-    create_indexes(client, workload_store, dry_run, opensearch_index, lts_payloads, upload_by_kpi)
 
-    for idx, (payload, start, end) in enumerate(lts_payloads):
-        try:
-            settings_dict = parse.json_dumper(payload.metadata.settings, strict=False)
-            key = ",".join(f"{k}={v}" for k, v in settings_dict.items() if (not variables or k in variables))
-        except Exception as e:
-            logging.warning(f"Failed to compute the name of the entry: {e}")
-            key = str(payload.metadata.settings)
+def bulk_upload(client, actions, dry_run, chunk_size, concurrency):
+    # index_name --> [successes, failures]
+    counts = defaultdict(lambda: [0, 0])
 
-        logging.info(f"Uploading payload #{idx} | {key}")
+    if dry_run:
+        for action in actions:
+            logging.info(f"==> skip upload of {action['_id']} to /{action['_index']} (dry run)")
+            counts[action["_index"]][0] += 1
 
-        payload_json = json.dumps(payload, default=functools.partial(parse.json_dumper, strict=False))
-        payload_dict = json.loads(payload_json)
+        return counts
 
-        if upload_by_kpi:
-            upload_kpis_to_opensearch(client, payload_dict, dry_run, opensearch_index)
-        upload_lts_to_opensearch(client, payload_dict, dry_run, opensearch_index)
-        upload_regression_results_to_opensearch(client, payload_dict, dry_run, opensearch_index)
+    logging.info(f"Uploading {len(actions)} documents by chunks of {chunk_size}, with {concurrency} parallel request{'s' if concurrency != 1 else ''} ...")
 
-    logging.info("All done :)")
+    bulk_kwargs = dict(chunk_size=chunk_size, raise_on_error=False, raise_on_exception=False)
+    results = opensearch_helpers.parallel_bulk(client, actions, thread_count=concurrency, **bulk_kwargs) \
+        if concurrency > 1 else opensearch_helpers.streaming_bulk(client, actions, **bulk_kwargs)
 
+    for ok, item in results:
+        _, result = item.popitem()
+        counts[result["_index"]][0 if ok else 1] += 1
+        if not ok:
+            logging.warning(f"==> failed to upload {result.get('_id')} to /{result['_index']}: {result.get('error')}")
 
-def upload_lts_to_opensearch(client, payload_dict, dry_run, opensearch_index):
-    logging.info(f"Uploading the LTS document to /{opensearch_index} ...")
+    return counts
 
-    return upload_to_opensearch(client, payload_dict, payload_dict["metadata"]["test_uuid"], dry_run, opensearch_index)
 
+def generate_lts_actions(payload_dict, opensearch_index):
+    yield create_bulk_action(payload_dict, payload_dict["metadata"]["test_uuid"], opensearch_index)
 
-def upload_kpis_to_opensearch(client, payload_dict, dry_run, opensearch_index):
+
+def generate_kpis_actions(payload_dict, opensearch_index):
 
     if "kpis" not in payload_dict.keys():
         logging.info(f"==> no KPI found in the payload.")
@@ -207,9 +293,17 @@ def upload_kpis_to_opensearch(client, payload_dict, dry_run, opensearch_index):
 
     for kpi_name, kpi in payload_dict.get("kpis", {}).items():
         kpi_index = get_kpi_index_name(opensearch_index, kpi_name)
-        logging.info(f"Uploading the KPI to /{kpi_index} ...")
 
-        upload_to_opensearch(client, kpi, kpi["test_uuid"], dry_run, kpi_index)
+        yield create_bulk_action(kpi, kpi["test_uuid"], kpi_index)
+
+
+def create_bulk_action(document, document_id, index):
+    return {
+        "_op_type": "index",
+        "_index": index,
+        "_id": document_id,
+        "_source": document,
+    }
 
 
 def upload_regression_results_to_opensearch(client, payload_dict, dry_run, opensearch_index):
@@ -11,7 +11,10 @@ def main(workload: str = "",
          results_dirname: str = "",
          lts_results_dirname: str = "",
          filters: list[str] = [],
-         generate: str = ""):
+         generate: str = "",
+         generate_batch: str = "",
+         generate_workers: int = 0,
+         serve_workers: int = 0):
     """
 Visualize MatrixBenchmarking results.
 
@@ -21,7 +24,10 @@ Env:
     MATBENCH_RESULTS_DIRNAME
     MATBENCH_LTS_RESULTS_DIRNAME
     MATBENCH_GENERATE
+    MATBENCH_GENERATE_BATCH
+    MATBENCH_GENERATE_WORKERS
     MATBENCH_FILTERS
+    MATBENCH_SERVE_WORKERS
 
 See the `FLAGS` section for the descriptions.
 
@@ -31,8 +37,11 @@ Args:
     results_dirname: Name of the directory where the results will be stored.  (Mandatory.)
     lts_results_dirname: Name of the directory where the LTS results are stored. (Mandatory.)
     generate: If set, the value is used as query to generates image files instead of running the Web UI.
+    generate_batch: If set, file with one query per line. The figures of all the queries are generated as a static site, instead of running the Web UI.
+    generate_workers: Number of worker processes generating the figures of 'generate_batch'. (Default: one per CPU.)
     filters: If provided, parse only the experiment matching the filters. Eg: expe=expe1:expe2,something=true.
     lts: If 'True', invoke the LTS parser only.
+    serve_workers: If set, serve the Web UI with this number of worker processes (requires gunicorn).
 """
     kwargs = dict(locals()) # capture the function arguments
 
@@ -50,6 +59,10 @@ Args:
         logging.error("The 'generate' flag must provide the query of the graph to generate.")
         return 1
 
+    if generate and generate_batch:
+        logging.error("The 'generate' and 'generate_batch' flags cannot be used together.")
+        return 1
+
     def run():
         cli_args.store_kwargs(kwargs, execution_mode="visualize")
 
@@ -83,8 +96,6 @@ Args:
 
         table_stats.register_all()
 
-        ui_web.run()
-
-        return 0
+        return ui_web.run() or 0
 
     return cli_args.TaskRunner(run)
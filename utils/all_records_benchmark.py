@@ -0,0 +1,116 @@
+#! /usr/bin/python3
+
+#
+# Micro-benchmark of the MatrixDefinition.all_records queries on
+# sparse matrices.
+#
+# A random matrix of --records entries is generated over --vars
+# variables of --values values each, so that most of the combinations
+# of the setting lists do not exist. The all_records query (records
+# index) is compared with the enumeration of the full product of the
+# setting lists, which all_records used to do. Both must return the
+# same records, in the same order.
+#
+# Usage: utils/all_records_benchmark.py [--vars N] [--values N] [--records N] [--repeat N]
+#
+
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+
+BASE_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
+
+sys.path.insert(0, BASE_DIR)
+import matrix_benchmarking.common as common
+
+
+def product_all_records(matrix, settings, setting_lists, gathered=False):
+    # the enumeration of the full product, for reference
+    for settings_values in sorted(itertools.product(*setting_lists), key=lambda x:x[0][0] if x else None):
+        settings.update(dict(settings_values))
+
+        key = matrix.settings_to_key(settings)
+        try:
+            e = matrix.processed_map[key]
+        except KeyError: # missing experiment, ignore
+            continue
+
+        if (gathered and e.is_gathered) or (not gathered and not e.is_gathered):
+            yield e
+
+
+def build_matrix(nb_vars, nb_values, nb_records, seed):
+    random.seed(seed)
+
+    matrix = common.MatrixDefinition()
+    for idx in range(nb_records):
+        settings = {f"var{var}": random.randrange(nb_values) for var in range(nb_vars)}
+        settings["stats"] = "benchmark"
+
+        key = matrix.settings_to_key(dict(settings))
+        common.MatrixEntry(f"record_{idx}", None, 0, key, key, dict(settings), dict(settings), matrix)
+
+    return matrix
+
+
+def get_query(nb_vars, nb_values):
+    settings = {f"var{var}": "---" for var in range(nb_vars)}
+    settings["stats"] = "benchmark"
+
+    setting_lists = [[(f"var{var}", value) for value in range(nb_values)] for var in range(nb_vars)]
+
+    return settings, setting_lists
+
+
+def measure(all_records, matrix, settings, setting_lists, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = [entry.location for entry in all_records(matrix, dict(settings), setting_lists)]
+        duration = time.perf_counter() - start
+
+        best = duration if best is None else min(best, duration)
+
+    return records, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the all_records queries on sparse matrices.")
+    parser.add_argument("--vars", type=int, default=7, help="the number of variables")
+    parser.add_argument("--values", type=int, default=6, help="the number of values of each variable")
+    parser.add_argument("--records", type=int, default=2000, help="the number of records in the matrix")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs, the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random matrix")
+    args = parser.parse_args()
+
+    matrix = build_matrix(args.vars, args.values, args.records, args.seed)
+    settings, setting_lists = get_query(args.vars, args.values)
+
+    combinations = args.values ** args.vars
+    print(f"{len(matrix.processed_map)} records, {combinations} combinations "
+          f"({len(matrix.processed_map) / combinations * 100:.2f}% filled)")
+
+    # build the records index outside of the measurements, it is reused by the queries
+    matrix._get_records_index()
+
+    index_records, index_duration = measure(common.MatrixDefinition.all_records, matrix, settings, setting_lists, args.repeat)
+    product_records, product_duration = measure(product_all_records, matrix, settings, setting_lists, args.repeat)
+
+    print(f"records index:  {index_duration * 1000:10.1f} ms/query")
+    print(f"product:        {product_duration * 1000:10.1f} ms/query")
+    print(f"speedup:        {product_duration / index_duration:10.1f}x")
+
+    if index_records != product_records:
+        print("ERROR: the records index and the product enumeration returned different records.", file=sys.stderr)
+        return 1
+
+    print(f"both returned the same {len(index_records)} records.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#! /usr/bin/python3
+
+#
+# Measures the import time of each command of the CLI, with
+# 'python -X importtime -m matrix_benchmarking.main <command> --help'.
+#
+# The import time of a command is the sum of the cumulative import
+# times of the modules imported at the top level (the other modules
+# are imported by them).
+#
+# Usage: utils/import_time.py [--repeat N] [--max-ms MS] [command ...]
+#
+# Without any command, all the commands of the CLI are measured, as
+# well as the top-level help. With --max-ms, returns 1 if a command
+# takes longer than MS milliseconds to import.
+#
+
+import os
+import sys
+import argparse
+import subprocess
+
+BASE_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
+
+sys.path.insert(0, BASE_DIR)
+from matrix_benchmarking.main import COMMANDS
+
+IMPORT_TIME_PREFIX = "import time:"
+
+
+def measure(command):
+    """
+    Returns the import time of the command, in microseconds, and the
+    slowest modules imported at the top level.
+    """
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [BASE_DIR, env.get("PYTHONPATH")]))
+
+    args = [sys.executable, "-X", "importtime", "-m", "matrix_benchmarking.main"]
+    if command:
+        args.append(command)
+    args.append("--help")
+
+    proc = subprocess.run(args, env=env, cwd=BASE_DIR,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+    total = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith(IMPORT_TIME_PREFIX): continue
+
+        _, cumulative, name = line[len(IMPORT_TIME_PREFIX):].split("|")
+        if not cumulative.strip().isdigit(): continue # the header line
+        if name.startswith("  "): continue # imported by another module
+
+        total += int(cumulative)
+        modules.append((int(cumulative), name.strip()))
+
+    return total, sorted(modules, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures the import time of the CLI commands.")
+    parser.add_argument("commands", nargs="*", help="the commands to measure (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs, the fastest is kept")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a command imports slower")
+    parser.add_argument("--top", type=int, default=3, help="the number of slowest modules to show")
+    args = parser.parse_args()
+
+    unknown = [command for command in args.commands if command not in COMMANDS]
+    if unknown:
+        print(f"ERROR: unknown command(s): {', '.join(unknown)}. "
+              f"Expected one of: {', '.join(COMMANDS)}", file=sys.stderr)
+        return 1
+
+    commands = args.commands or [None] + list(COMMANDS)
+
+    failed = []
+    for command in commands:
+        total, modules = min((measure(command) for _ in range(max(args.repeat, 1))),
+                             key=lambda result: result[0])
+
+        name = command or "(help)"
+        slowest = ", ".join(f"{module} {cumulative / 1000:.0f}ms" for cumulative, module in modules[:args.top])
+        print(f"{name:<20} {total / 1000:8.1f} ms   {slowest}")
+
+        if args.max_ms is not None and total / 1000 > args.max_ms:
+            failed.append(name)
+
+    if failed:
+        print(f"ERROR: import time above {args.max_ms}ms: {', '.join(failed)}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#! /usr/bin/python3
+
+#
+# Benchmark of the regression report tables, rendered with the
+# plotting.ui.table Table and with the pandas Styler, which the report
+# used to do.
+#
+# Two tables of the report are rendered: the evaluation of a
+# regression result (one row, rendered for every entry x KPI of the
+# report) and the results overview (--rows entries x --kpis KPIs). Both
+# renderers must show the same cell values.
+#
+# Usage: utils/report_table_benchmark.py [--rows N] [--kpis N] [--tables N] [--repeat N]
+#
+
+import os
+import sys
+import time
+import random
+import argparse
+import html.parser
+
+BASE_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
+
+sys.path.insert(0, BASE_DIR)
+import pandas as pd
+
+from matrix_benchmarking.plotting.ui.table import Table
+from matrix_benchmarking.analyze.report import STYLE_TABLE
+
+
+class CellParser(html.parser.HTMLParser):
+    """
+    Collects the text of the <td> cells of an HTML table.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cells = []
+        self._in_cell = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "td":
+            self._in_cell = True
+            self.cells.append("")
+
+    def handle_endtag(self, tag):
+        if tag == "td":
+            self._in_cell = False
+
+    def handle_data(self, data):
+        if self._in_cell:
+            self.cells[-1] += data
+
+
+def get_cells(table_html):
+    parser = CellParser()
+    parser.feed(table_html)
+
+    return [cell.strip() for cell in parser.cells]
+
+
+def evaluation_style(row):
+    return [f"background: {row.rating_color}" for _ in row.keys()]
+
+
+EVALUATION_FMT = dict(rating="{:.2f}")
+
+
+def get_evaluation_records(count):
+    return [[dict(improved=random.random() > 0.5,
+                  rating=random.random(),
+                  rating_color=random.choice(["#ccf0a2", "#f0a2a2", "#ffffff"]),
+                  description="the KPI value is within the expected range",
+                  accepted=random.random() > 0.2)]
+            for _ in range(count)]
+
+
+def table_evaluation(records):
+    return Table.from_records(records)\
+                .format(EVALUATION_FMT)\
+                .apply(evaluation_style)\
+                .hide_columns(["rating_color"])\
+                .set_table_styles(table_styles=STYLE_TABLE)\
+                .to_html()
+
+
+def styler_evaluation(records):
+    return pd.DataFrame(records).style\
+                .format(EVALUATION_FMT)\
+                .apply(evaluation_style, axis=1)\
+                .hide(["rating_color"], axis=1)\
+                .hide(axis="index")\
+                .set_table_styles(table_styles=STYLE_TABLE)\
+                .to_html()
+
+
+def overview_style(row):
+    return ["background: #ADD8E6" if key.startswith("var") else
+            f"background: {'#ccf0a2' if value > 0.5 else '#f0a2a2'}"
+            for key, value in zip(row.keys(), row.values)]
+
+
+def get_overview_df(nb_rows, nb_kpis):
+    records = []
+    for idx in range(nb_rows):
+        record = dict(var0=f"value_{idx % 7}", var1=idx)
+        record.update({f"kpi_{kpi}": random.random() for kpi in range(nb_kpis)})
+        records.append(record)
+
+    return pd.DataFrame(records)
+
+
+def get_overview_fmt(df):
+    return {column: "{:.3f}" for column in df.columns if column.startswith("kpi_")}
+
+
+def table_overview(df):
+    return Table.from_df(df)\
+                .apply(overview_style)\
+                .format(get_overview_fmt(df))\
+                .set_table_styles(table_styles=STYLE_TABLE)\
+                .to_html()
+
+
+def styler_overview(df):
+    return df.style\
+             .apply(overview_style, axis=1)\
+             .format(get_overview_fmt(df))\
+             .hide(axis="index")\
+             .set_table_styles(table_styles=STYLE_TABLE)\
+             .to_html()
+
+
+def measure(render, inputs, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [render(value) for value in inputs]
+        duration = time.perf_counter() - start
+
+        best = duration if best is None else min(best, duration)
+
+    return outputs, best
+
+
+def compare(name, table_render, styler_render, inputs, repeat):
+    table_outputs, table_duration = measure(table_render, inputs, repeat)
+    styler_outputs, styler_duration = measure(styler_render, inputs, repeat)
+
+    count = len(inputs)
+    print(f"{name}:")
+    print(f"  Table:  {table_duration / count * 1000:10.2f} ms/table  {sum(map(len, table_outputs)) / count / 1024:8.1f} KB/table")
+    print(f"  Styler: {styler_duration / count * 1000:10.2f} ms/table  {sum(map(len, styler_outputs)) / count / 1024:8.1f} KB/table")
+    print(f"  speedup: {styler_duration / table_duration:9.1f}x")
+
+    for table_html, styler_html in zip(table_outputs, styler_outputs):
+        if get_cells(table_html) != get_cells(styler_html):
+            print(f"ERROR: {name}: the Table and the Styler rendered different cell values.", file=sys.stderr)
+            return False
+
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the report tables, Table vs pandas Styler.")
+    parser.add_argument("--rows", type=int, default=200, help="the number of entries of the overview table")
+    parser.add_argument("--kpis", type=int, default=10, help="the number of KPIs of the overview table")
+    parser.add_argument("--tables", type=int, default=500, help="the number of evaluation tables")
+    parser.add_argument("--repeat", type=int, default=3, help="the number of runs, the fastest is kept")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random values")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    success = compare(f"evaluation tables (x{args.tables})", table_evaluation, styler_evaluation,
+                      get_evaluation_records(args.tables), args.repeat)
+
+    success &= compare(f"overview table ({args.rows} entries x {args.kpis} KPIs)", table_overview, styler_overview,
+                       [get_overview_df(args.rows, args.kpis)], args.repeat)
+
+    if not success:
+        return 1
+
+    print("both renderers showed the same cell values.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
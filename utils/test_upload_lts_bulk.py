@@ -0,0 +1,242 @@
+#! /usr/bin/python3
+
+#
+# Checks the bulk requests of upload_lts against a local stand-in
+# OpenSearch server.
+#
+# The stand-in server records the requests it receives, and answers
+# the bulk requests with a failure for the documents with the
+# 'bad' id.
+#
+# Usage: utils/test_upload_lts_bulk.py (or python -m pytest utils/)
+#
+
+import os
+import sys
+import gzip
+import json
+import types
+import logging
+import threading
+import http.server
+
+BASE_DIR = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
+
+sys.path.insert(0, BASE_DIR)
+from opensearchpy import OpenSearch
+
+import matrix_benchmarking.store as store
+import matrix_benchmarking.upload_lts as upload_lts
+
+INDEX = "matbench"
+FAILING_ID = "bad"
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    requests = [] # (method, path, body)
+    indexes = set()
+
+    def _reply(self, status, response=None):
+        body = json.dumps(response).encode() if response is not None else b""
+
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self):
+        body = self.rfile.read(int(self.headers.get("content-length", 0)))
+        if self.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+
+        body = body.decode()
+        self.requests.append((self.command, self.path, body))
+
+        return body
+
+    def do_HEAD(self):
+        self._read_body()
+        self._reply(200 if self.path.strip("/") in self.indexes else 404)
+
+    def do_PUT(self):
+        self._read_body()
+        self.indexes.add(self.path.strip("/"))
+        self._reply(200, {"acknowledged": True})
+
+    def do_POST(self):
+        body = self._read_body()
+
+        if not self.path.startswith("/_bulk"):
+            self._reply(200, {}) # _refresh
+            return
+
+        lines = [json.loads(line) for line in body.strip().split("\n")]
+        items = []
+        for action in lines[0::2]:
+            op_type, meta = next(iter(action.items()))
+            failed = meta["_id"] == FAILING_ID
+
+            item = dict(_index=meta["_index"], _id=meta["_id"], status=400 if failed else 201)
+            if failed:
+                item["error"] = "rejected by the stand-in server"
+            items.append({op_type: item})
+
+        self._reply(200, dict(took=1, errors=any("error" in list(item.values())[0] for item in items), items=items))
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    StandInHandler.requests = []
+    StandInHandler.indexes = set()
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def get_payloads(count):
+    payloads = []
+    for idx in range(count):
+        test_uuid = FAILING_ID if idx == count - 1 else f"uuid-{idx}"
+        payloads.append(dict(
+            metadata=dict(test_uuid=test_uuid, settings=dict(expe="test", idx=idx)),
+            kpis={
+                "kpi_a": dict(test_uuid=test_uuid, value=idx),
+                "kpi_b": dict(test_uuid=test_uuid, value=idx * 2),
+            },
+            results=dict(value=idx),
+            regression_results=[dict(accepted=True)],
+        ))
+
+    return payloads
+
+
+def get_bulk_documents(requests):
+    """
+    Returns the (action, source) pairs of the bulk requests.
+    """
+
+    documents = []
+    for method, path, body in requests:
+        if not path.startswith("/_bulk"): continue
+        assert method == "POST"
+        assert body.endswith("\n"), "the bulk body must end with a newline"
+
+        lines = [json.loads(line) for line in body.strip().split("\n")]
+        assert len(lines) % 2 == 0, "the bulk body must be made of action/source pairs"
+
+        documents += list(zip(lines[0::2], lines[1::2]))
+
+    return documents
+
+
+def run_upload(payloads, upload_by_kpi, chunk_size, concurrency):
+    server = start_server()
+    client = OpenSearch(hosts=[{"host": "127.0.0.1", "port": server.server_port}], pool_maxsize=concurrency)
+
+    get_lts_schema = store.get_lts_schema
+    store.get_lts_schema = lambda: None # no LTS schema, the KPI indexes are created during the upload
+
+    workload_store = types.SimpleNamespace(
+        build_lts_payloads=lambda: ((payload, None, None) for payload in payloads)
+    )
+
+    # the indexes and the regression results must not be handled while
+    # the bulk helper consumes the documents
+    bulk_running = threading.Event()
+    wrapped = dict(bulk_upload=upload_lts.bulk_upload,
+                   opensearch_create_index=upload_lts.opensearch_create_index,
+                   upload_regression_results_to_opensearch=upload_lts.upload_regression_results_to_opensearch)
+
+    def bulk_upload(*args, **kwargs):
+        bulk_running.set()
+        try:
+            return wrapped["bulk_upload"](*args, **kwargs)
+        finally:
+            bulk_running.clear()
+
+    def outside_of_bulk(name):
+        def wrapper(*args, **kwargs):
+            assert not bulk_running.is_set(), f"{name} called during the bulk upload"
+            return wrapped[name](*args, **kwargs)
+        return wrapper
+
+    upload_lts.bulk_upload = bulk_upload
+    upload_lts.opensearch_create_index = outside_of_bulk("opensearch_create_index")
+    upload_lts.upload_regression_results_to_opensearch = outside_of_bulk("upload_regression_results_to_opensearch")
+
+    try:
+        ret = upload_lts.upload(client, workload_store, False, INDEX, upload_by_kpi, chunk_size, concurrency)
+    finally:
+        for name, fct in wrapped.items():
+            setattr(upload_lts, name, fct)
+        store.get_lts_schema = get_lts_schema
+        server.shutdown()
+
+    return ret, StandInHandler.requests
+
+
+def check_upload(upload_by_kpi, chunk_size, concurrency):
+    payloads = get_payloads(7)
+
+    ret, requests = run_upload(payloads, upload_by_kpi, chunk_size, concurrency)
+
+    assert ret == 1, "the failed document should make the upload fail"
+
+    expected = []
+    for payload in payloads:
+        if upload_by_kpi:
+            for kpi_name, kpi in payload["kpis"].items():
+                expected.append(({"index": {"_index": f"{INDEX}.{kpi_name}", "_id": kpi["test_uuid"]}}, kpi))
+        expected.append(({"index": {"_index": INDEX, "_id": payload["metadata"]["test_uuid"]}}, payload))
+
+    documents = get_bulk_documents(requests)
+    key = lambda document: json.dumps(document, sort_keys=True)
+    assert sorted(documents, key=key) == sorted(expected, key=key)
+
+    bulk_requests = [body for _, path, body in requests if path.startswith("/_bulk")]
+    assert all(len(body.strip().split("\n")) <= 2 * chunk_size for body in bulk_requests), \
+        "the bulk requests should not be larger than the chunk size"
+
+    # the indexes must exist before the documents are sent to them
+    created_indexes = set()
+    for method, path, body in requests:
+        if method == "PUT":
+            created_indexes.add(path.strip("/"))
+            continue
+
+        for action, _ in get_bulk_documents([(method, path, body)]):
+            assert action["index"]["_index"] in created_indexes, f"{action} sent before the creation of its index"
+
+    # a single refresh, at the end
+    refreshes = [path for _, path, _ in requests if "_refresh" in path]
+    assert len(refreshes) == 1 and "_refresh" in requests[-1][1]
+
+    expected_indexes = {INDEX} | ({f"{INDEX}.kpi_a", f"{INDEX}.kpi_b"} if upload_by_kpi else set())
+    assert set(refreshes[0].split("/")[1].split(",")) == expected_indexes
+
+
+def test_bulk_upload():
+    check_upload(upload_by_kpi=False, chunk_size=3, concurrency=1)
+
+
+def test_bulk_upload_by_kpi():
+    check_upload(upload_by_kpi=True, chunk_size=4, concurrency=1)
+
+
+def test_parallel_bulk_upload_by_kpi():
+    check_upload(upload_by_kpi=True, chunk_size=2, concurrency=3)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+
+    for name, test in list(globals().items()):
+        if not name.startswith("test_"): continue
+
+        test()
+        print(f"{name}: passed")